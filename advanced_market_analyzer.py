@@ -1,58 +1,125 @@
 import os
+import re
 import json
-import feedparser
-import yfinance as yf
+import argparse
 from datetime import datetime, timedelta
 from notion_client import Client, APIResponseError
 from dotenv import load_dotenv
 import google.generativeai as genai
 import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-# --- 1. 설정 및 초기화 ---
-print("=" * 60)
-print("고급 시장 분석 시스템 초기화...")
-print("=" * 60)
-
+# 각 모듈이 import 시점에 환경 변수로 설정을 읽으므로 .env를 프로젝트 모듈보다 먼저 로드
 load_dotenv()
 
+from rss_fetcher import fetch_feeds_concurrently, load_feeds
+from analysis_cache import AnalysisCache
+from dedup import deduplicate_articles, RecentArticleIndex
+from prompt_builder import format_article, pack_batches, ANALYSIS_INPUT_TOKEN_BUDGET, ANALYSIS_OUTPUT_TOKEN_BUDGET
+from text_utils import estimate_tokens, canonical_url, content_hash, strip_html
+from notion_writer import NotionWriter
+from notion_sync import NotionMirror, iter_database_query, to_notion_timestamp
+from json_salvage import salvage_json_objects, strip_code_fences
+from price_store import PriceStore
+from evaluation import evaluate_predictions, summarize_accuracy, parse_tickers, EVALUATION_BENCHMARK, EVALUATION_HORIZONS
+from weekly_analytics import build_weekly_aggregates
+from run_journal import RunJournal, PIPELINE_STAGES
+from metrics import metrics, METRICS_PATH
+from stream_daemon import StreamingDaemon, DailyJob, STREAM_JOBS_AT_UTC
+from gemini_scheduler import GeminiScheduler, usage_counts, GEMINI_REQUESTS_PER_MINUTE
+from ticker_index import TickerIndex
+
+# --- 1. 설정 및 초기화 ---
 # API 키 및 ID 로드
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
 NOTION_FEEDBACK_DB_ID = os.getenv("NOTION_FEEDBACK_DB_ID")
 NOTION_REPORT_DB_ID = os.getenv("NOTION_REPORT_DB_ID")
-
-# API 호출 횟수 카운터
-api_call_counter = {'gemini': 0, 'notion': 0}
-
-# 유효성 검사
-if not all([NOTION_API_KEY, GEMINI_API_KEY, NOTION_DATABASE_ID, NOTION_FEEDBACK_DB_ID, NOTION_REPORT_DB_ID]):
-    raise ValueError("하나 이상의 필수 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
-
-# 클라이언트 초기화
-notion = Client(auth=NOTION_API_KEY)
-genai.configure(api_key=GEMINI_API_KEY)
-gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-
-# RSS 피드 소스
-RSS_FEEDS = {
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+
+# 외부 클라이언트 (init_clients()에서 생성)
+notion = None
+notion_writer = None
+notion_mirror = None
+gemini_model = None
+analysis_model = None
+analysis_cached_content = None
+price_store = None
+gemini_scheduler = None
+
+def init_clients(notion_client=None, model_factory=None, price_source=None):
+    """외부 클라이언트를 만든다. 인자로 넘긴 것(로컬 대역 등)은 그대로 쓰고, 나머지만 환경 변수의 키로 만든다.
+
+    model_factory는 genai.GenerativeModel처럼 (모델 이름, system_instruction=...)을 받아 모델을 만드는 호출 가능 객체다.
+    """
+    global notion, notion_writer, notion_mirror, gemini_model, analysis_model, analysis_cached_content
+    global price_store, gemini_scheduler
+    print("=" * 60)
+    print("고급 시장 분석 시스템 초기화...")
+    print("=" * 60)
+
+    # 유효성 검사 (주입하지 않은 클라이언트의 API 키만 요구)
+    required = [NOTION_DATABASE_ID, NOTION_FEEDBACK_DB_ID, NOTION_REPORT_DB_ID]
+    if notion_client is None:
+        required.append(NOTION_API_KEY)
+    if model_factory is None:
+        required.append(GEMINI_API_KEY)
+    if not all(required):
+        raise ValueError("하나 이상의 필수 환경 변수가 설정되지 않았습니다. .env 파일을 확인하세요.")
+
+    notion = notion_client or Client(auth=NOTION_API_KEY)
+    # 모든 Notion 호출이 공유하는 속도 제한기 + 멱등 쓰기 큐
+    notion_writer = NotionWriter(notion)
+    # 세 Notion 데이터베이스의 로컬 미러 (조회는 여기서 읽고, 변경분만 동기화)
+    notion_mirror = NotionMirror(notion_writer)
+    if model_factory is None:
+        genai.configure(api_key=GEMINI_API_KEY)
+        model_factory = genai.GenerativeModel
+    gemini_model = model_factory(GEMINI_MODEL_NAME)
+    analysis_model, analysis_cached_content = create_analysis_model(model_factory)
+    # 종목별 일봉을 로컬에 저장하고 부족한 구간만 일괄로 받아오는 가격 저장소
+    price_store = PriceStore(source=price_source)
+    # 고정 30초 대기 대신 RPM/TPM 속도 제한기로 호출 간격을 조절
+    gemini_scheduler = GeminiScheduler(gemini_model)
+
+def close_clients():
+    gemini_scheduler.shutdown()
+    if analysis_cached_content is not None:
+        try:
+            analysis_cached_content.delete()
+        except Exception:
+            pass
+    price_store.close()
+    notion_writer.close()
+    notion_mirror.close()
+
+# RSS 피드 소스 (RSS_FEEDS_FILE 환경 변수로 JSON 피드 목록을 지정하면 대체됨)
+RSS_FEEDS = load_feeds({
     "Yahoo Finance": "https://finance.yahoo.com/rss/topstories",
     "CNBC": "https://www.cnbc.com/id/100003114/device/rss/rss.html",
     "MarketWatch": "http://feeds.marketwatch.com/marketwatch/topstories/",
     "Seeking Alpha": "https://seekingalpha.com/feed.xml"
-}
+})
+# 손상된 배치 응답에서 누락된 기사를 재제출할 때 배치를 나누는 최대 깊이
+ANALYSIS_MAX_SPLIT_DEPTH = int(os.getenv("ANALYSIS_MAX_SPLIT_DEPTH", "2"))
+# 피드당 최대 기사 수 (0이면 제한 없음)
+RSS_MAX_ENTRIES_PER_FEED = int(os.getenv("RSS_MAX_ENTRIES_PER_FEED", "10"))
+# 종목 언급이 없는 기사를 모델 호출 전에 걸러낼지 여부
+TICKER_FILTER_ENABLED = os.getenv("TICKER_FILTER_ENABLED", "true").lower() not in ("0", "false", "no")
+# 분석 지침을 Gemini 컨텍스트 캐시에 보관할 시간(분). 0이면 system instruction만 사용
+GEMINI_CONTEXT_CACHE_MINUTES = float(os.getenv("GEMINI_CONTEXT_CACHE_MINUTES", "0"))
+# 일일 피드백이 채점할 예측의 작성 기간(일). 청산 종가(1거래일 뒤)가 아직 없던 예측(장중 작성, 주말/휴장)도
+# 다음 실행에서 채점되도록 1거래일 기간 + 1거래일 이상을 덮음 (이미 저장된 피드백은 멱등 키로 건너뜀)
+FEEDBACK_LOOKBACK_DAYS = int(os.getenv("FEEDBACK_LOOKBACK_DAYS", "4"))
 
 # --- 2. 프롬프트 정의 ---
-def get_batch_analysis_prompt(articles):
-    article_inputs = []
-    for i, article in enumerate(articles):
-        article_inputs.append(f"<article index=\"{i}\"><title>{article['title']}</title><content>{article['summary']}</content></article>")
-    
-    return f'''
+# 배치마다 바뀌지 않는 분석 지침. 모델의 system instruction으로 한 번만 설정하고, 호출마다 기사 목록만 보냄
+ANALYSIS_SYSTEM_INSTRUCTION = '''
     You are a senior equity analyst at a top-tier investment firm. Your job is to analyze news and predict short-term stock price movements with high accuracy.
 
-    ### News Articles:
-    {''.join(article_inputs)}
+    Each request contains a batch of news articles as `<article index="N">` elements.
 
     ### Analysis Framework:
     For each article, perform this structured analysis:
@@ -80,7 +147,7 @@ def get_batch_analysis_prompt(articles):
         - Low (1-4): Speculative, opinion-based, or high-risk pre-mortem.
 
     ### Output Format (JSON):
-    {{
+    {
       "article_index": <int>,
       "korean_title": "기사 제목을 한글로 번역",
       "mentioned_tickers": ["AAPL", "MSFT"],
@@ -91,12 +158,12 @@ def get_batch_analysis_prompt(articles):
         2) 주가 영향 논리: [왜 오르거나 내릴 것인가]
         3) 시간 프레임: [단기/중기 영향]",
       "pre_mortem_risks": "KOREAN: 이 예측이 틀릴 수 있는 가장 강력한 이유 3가지 (Pre-mortem 분석 결과)"
-    }}
+    }
 
     ### Quality Standards:
     - ❌ Bad: "애플의 신제품 출시로 긍정적 전망"
     - ✅ Good (Example Output):
-      {{
+      {
         "article_index": 0,
         "korean_title": "애플, 아이폰15 사전예약 전년 대비 20% 증가",
         "mentioned_tickers": ["AAPL"],
@@ -104,35 +171,65 @@ def get_batch_analysis_prompt(articles):
         "conviction_score": 7,
         "summary": "1) 핵심 사건: 아이폰15 사전예약이 전년 대비 20% 증가하며 초기 수요 강세 확인.\n2) 주가 영향 논리: 단기 매출 기대감 상승으로 주가에 긍정적.\n3) 시간 프레임: 단기 (다음 분기 실적 발표 전)",
         "pre_mortem_risks": "1) 거시경제 위축으로 실제 판매 전환율이 낮을 수 있음.\n2) 높은 부품 비용으로 인해 마진이 압박받을 수 있음.\n3) 해당 뉴스가 이미 시장 기대치에 선반영되었을 가능성."
-      }}
+      }
 
     ### Critical Rules:
     - Only analyze articles mentioning **specific publicly traded tickers**.
+    - `<candidate_tickers>` lists tickers detected locally in the article. Use them as hints: drop any that the article does not actually discuss, and add tickers that were missed.
     - Distinguish between "company did X" (fact) vs. "analyst says X" (opinion).
     - **[NEW RULE] Your `conviction_score` MUST reflect your `pre_mortem_risks`. If `pre_mortem_risks` are significant, the score CANNOT be 9 or 10.**
 
     Return ONLY a valid JSON array. No explanations outside JSON.
     '''
 
-def get_weekly_feedback_and_prompt_improvement_prompt(failed_predictions, successful_predictions):
-    total = len(failed_predictions) + len(successful_predictions)
-    accuracy = (len(successful_predictions) / total * 100) if total > 0 else 0
+def get_batch_analysis_prompt(articles):
+    # HTML/상투 문구를 제거한 요약만 프롬프트에 포함
+    article_inputs = [format_article(i, article) for i, article in enumerate(articles)]
+    return f"### News Articles:\n{''.join(article_inputs)}\n\nReturn ONLY a valid JSON array."
+
+def create_analysis_model(model_factory):
+    # 정적 지침을 명시적 컨텍스트 캐시에 올리거나(GEMINI_CONTEXT_CACHE_MINUTES > 0),
+    # system instruction으로 설정해 모든 배치 호출의 공통 접두부(암시적 캐시 대상)로 만듦
+    if GEMINI_CONTEXT_CACHE_MINUTES > 0 and model_factory is genai.GenerativeModel:
+        try:
+            cached_content = genai.caching.CachedContent.create(
+                model=f'models/{GEMINI_MODEL_NAME}',
+                display_name='market-analysis-instructions',
+                system_instruction=ANALYSIS_SYSTEM_INSTRUCTION,
+                ttl=timedelta(minutes=GEMINI_CONTEXT_CACHE_MINUTES),
+            )
+            return genai.GenerativeModel.from_cached_content(cached_content=cached_content), cached_content
+        except Exception as e:
+            # 캐시 최소 토큰 수 미달 등으로 실패하면 system instruction으로 대체
+            print(f"  - 컨텍스트 캐시 생성 실패, system instruction으로 대체: {e}")
+    return model_factory(GEMINI_MODEL_NAME, system_instruction=ANALYSIS_SYSTEM_INSTRUCTION), None
+
+def get_weekly_feedback_and_prompt_improvement_prompt(aggregates):
+    # 원본 예측 전체 대신 로컬에서 계산한 고정 크기 집계 + 대표 실패 표본만 전달
+    total = aggregates["total"]
+    correct = aggregates["correct"]
+    accuracy = aggregates["accuracy"]
+    failure_samples = aggregates["failure_samples"]
+    statistics = {k: v for k, v in aggregates.items() if k != "failure_samples"}
 
     return f'''
     You are an AI performance auditor. Analyze prediction accuracy and suggest improvements.
 
     ### Performance Data:
-    - **Failed Predictions (with pre-mortem)**: 
-      - Each object shows the prediction that failed, and the `pre_mortem` analysis the AI wrote *before* it failed.
-      - {str(failed_predictions)}
-    - **Successful Predictions**: {str(successful_predictions)}
+    - **Aggregates** (computed locally over all {total} scored predictions, {aggregates["horizon_days"]}-day horizon):
+      - `by_ticker` / `by_source` list the most frequent groups only. `conviction_calibration` shows accuracy per `conviction_score` bucket.
+      - `failure_risk_types` is a keyword heuristic over each failure's pre-mortem: "ignored" = specific risks were written but conviction stayed high, "missed" = only generic risks (or none) were written.
+      - {json.dumps(statistics, ensure_ascii=False)}
+    - **Representative Failures (with pre-mortem)**:
+      - A bounded sample spread across risk types and prediction directions, highest conviction first. Each shows the `pre_mortem` analysis the AI wrote *before* it failed.
+      - {json.dumps(failure_samples, ensure_ascii=False)}
     - **Accuracy**: {accuracy:.1f}%
 
     ### Your Task:
     Analyze patterns and generate a JSON report. Only suggest improvements if you find **systematic, recurring failures**.
 
     **CRITICAL ANALYSIS for `failure_analysis`**:
-    For each failure, check its `pre_mortem` field.
+    Use `failure_risk_types` and `conviction_calibration` for the overall picture, and check the `pre_mortem` field of each sampled failure.
     1.  **"Ignored Risk"**: Did the AI correctly identify the risk in its `pre_mortem` but still make the wrong call (e.g., high conviction)?
     2.  **"Missed Risk"**: Was the failure caused by a risk the AI completely failed to identify in its `pre_mortem`?
     Your root cause analysis MUST differentiate between these two failure types.
@@ -141,7 +238,7 @@ def get_weekly_feedback_and_prompt_improvement_prompt(failed_predictions, succes
     {{
       "weekly_summary": {{
         "total_predictions": {total},
-        "correct_predictions": {len(successful_predictions)},
+        "correct_predictions": {correct},
         "accuracy_rate": "{accuracy:.1f}%",
         "key_takeaway": "One-sentence summary in KOREAN"
       }},
@@ -167,6 +264,69 @@ def get_weekly_feedback_and_prompt_improvement_prompt(failed_predictions, succes
     '''
 
 # --- 3. 핵심 기능 함수 ---
+def sync_notion_mirror():
+    # 세 데이터베이스를 마지막 동기화 이후 수정된 페이지만 받아 로컬 미러에 반영
+    print("\n[Notion 동기화] 로컬 미러 증분 동기화 중...")
+    for name, db_id in [("메인 분석 DB", NOTION_DATABASE_ID), ("일일 피드백 DB", NOTION_FEEDBACK_DB_ID), ("주간 보고서 DB", NOTION_REPORT_DB_ID)]:
+        start = time.perf_counter()
+        try:
+            fetched = notion_mirror.sync(db_id)
+            print(f"  ✓ {name}: {fetched}개 페이지 갱신 ({time.perf_counter() - start:.2f}초)")
+            # Notion에서 삭제된 페이지는 미러와 쓰기 기록에서도 지워 채점 대상에서 빼고 다시 저장할 수 있게 함
+            removed = notion_mirror.sweep(db_id)
+            if removed:
+                notion_writer.forget_pages([page["id"] for page in removed],
+                                           keys=[saved_page_key(db_id, page) for page in removed])
+                print(f"  - {name}: Notion에서 삭제된 페이지 {len(removed)}개를 미러에서 제거")
+        except Exception as e:
+            print(f"  ✗ {name} 동기화 실패 (기존 미러 데이터 사용): {e}")
+    registered = register_saved_keys()
+    print(f"  - 미러에서 저장된 페이지 키 {registered}개 등록")
+
+def article_key(article):
+    # 기사 URL(없으면 콘텐츠 해시)을 Notion 페이지의 멱등 키로 사용
+    return canonical_url(article.get('link')) or f"content:{content_hash(article)}"
+
+def article_aliases(article):
+    # 중복 제거로 묶인 다른 출처의 URL. 실행마다 대표 기사(요약이 가장 긴 출처)가 달라져도 같은 사건으로 인식
+    return [url for url in (canonical_url(dup.get('link')) for dup in article.get('duplicate_sources', [])) if url]
+
+def is_saved_article(article):
+    return any(notion_writer.is_known(key) for key in [article_key(article), *article_aliases(article)])
+
+def _plain_text(prop):
+    items = (prop or {}).get("title") or (prop or {}).get("rich_text") or []
+    return "".join(item.get("text", {}).get("content", "") for item in items)
+
+def feedback_key(page):
+    # 피드백 페이지의 예측 ID + 종목으로 build_feedback_rows와 같은 키를 복원 (예측 ID가 없는 예전 페이지는 None)
+    props = page.get("properties", {})
+    prediction_id = _plain_text(props.get("예측 ID"))
+    return f"feedback:{prediction_id}:{_plain_text(props.get('종목'))}" if prediction_id else None
+
+def report_key(page):
+    # 보고서 제목의 날짜("주간 피드백 보고서 (2024년 10월 21일)")로 보고서 키를 복원
+    match = re.search(r"(\d{4})년 (\d{2})월 (\d{2})일", _plain_text(page.get("properties", {}).get("보고서 기간")))
+    return f"report:{match.group(1)}-{match.group(2)}-{match.group(3)}" if match else None
+
+def saved_page_key(database_id, page):
+    # 저장된 페이지에서 저장 단계가 사용한 멱등 키를 복원
+    if database_id == NOTION_FEEDBACK_DB_ID:
+        return feedback_key(page)
+    if database_id == NOTION_REPORT_DB_ID:
+        return report_key(page)
+    return canonical_url(page.get("properties", {}).get("URL", {}).get("url"))
+
+def register_saved_keys():
+    # 이미 저장된 페이지는 페이지마다 조회하지 않고, 로컬 미러에서 복원한 멱등 키로 한 번에 건너뜀
+    # (로컬 쓰기 기록(.market_state)을 잃어도 기사/피드백/보고서 페이지를 다시 만들지 않음)
+    keys = [
+        saved_page_key(db_id, page)
+        for db_id in (NOTION_DATABASE_ID, NOTION_FEEDBACK_DB_ID, NOTION_REPORT_DB_ID)
+        for page in notion_mirror.pages(db_id)
+    ]
+    return notion_writer.register_keys(keys)
+
 def check_notion_connections():
     print("\n[단계 1/6] Notion 데이터베이스 연결 확인 중...")
     db_map = {
@@ -177,8 +337,7 @@ def check_notion_connections():
     all_connected = True
     for name, db_id in db_map.items():
         try:
-            notion.databases.retrieve(database_id=db_id)
-            api_call_counter['notion'] += 1
+            notion_writer.call(notion.databases.retrieve, database_id=db_id)
             print(f"  ✓ {name}: 연결 성공")
         except APIResponseError as e:
             print(f"  ✗ {name}: 연결 실패! .env 파일의 ID가 정확한지, Notion에서 통합 권한을 부여했는지 확인하세요.")
@@ -188,59 +347,202 @@ def check_notion_connections():
         raise ConnectionError("Notion 데이터베이스에 연결할 수 없습니다. 스크립트를 종료합니다.")
     print("모든 Notion 데이터베이스가 성공적으로 연결되었습니다.")
 
-def fetch_news_from_rss(feeds):
+def fetch_news_from_rss(feeds, max_entries_per_feed=RSS_MAX_ENTRIES_PER_FEED):
     print("\n[단계 2/6] RSS 피드에서 최신 뉴스 수집 중...")
     articles = []
-    for name, url in feeds.items():
-        try:
-            feed = feedparser.parse(url)
-            for entry in feed.entries[:10]:
-                articles.append({
-                    'source': name,
-                    'title': entry.title,
-                    'link': entry.link,
-                    'summary': entry.get('summary', ''),
-                    'published': entry.get('published', datetime.now().isoformat())
-                })
-            print(f"  ✓ {name}: {len(feed.entries[:10])}개 수집")
-        except Exception as e:
-            print(f"  ✗ {name} 수집 실패: {e}")
-    print(f"총 {len(articles)}개의 기사를 수집했습니다.")
+    start = time.perf_counter()
+    feed_results = fetch_feeds_concurrently(feeds)
+    for feed_result in sorted(feed_results, key=lambda r: r['name']):
+        name = feed_result['name']
+        stats = f"{feed_result['latency']:.2f}초, {feed_result['bytes']:,} bytes"
+        if feed_result['error']:
+            print(f"  ✗ {name} 수집 실패: {feed_result['error']} ({stats})")
+            continue
+        if feed_result['status'] == 304:
+            print(f"  - {name}: 변경 없음 (304, {stats})")
+            continue
+
+        entries = feed_result['entries']
+        if max_entries_per_feed:
+            entries = entries[:max_entries_per_feed]
+        for entry in entries:
+            if not entry.get('title') or not entry.get('link'):
+                continue
+            articles.append({
+                'source': name,
+                'title': entry.title,
+                'link': entry.link,
+                'summary': entry.get('summary', ''),
+                'published': entry.get('published', datetime.now().isoformat())
+            })
+        print(f"  ✓ {name}: {len(entries)}개 수집 ({stats})")
+    metrics.inc("articles_total", len(articles), stage="fetched")
+    print(f"총 {len(articles)}개의 기사를 수집했습니다. (피드 {len(feed_results)}개, {time.perf_counter() - start:.2f}초)")
     return articles
 
-def analyze_articles_in_batch(articles, batch_size=4):
-    print("\n[단계 3/6] Gemini 배치 분석 시작 (분당 2회 제한 준수)...")
+def parse_batch_response(response, batch):
+    # 일부 객체가 깨졌거나 응답이 잘려도 올바른 객체는 모두 살려냄
+    batch_results, stats = salvage_json_objects(response.text)
+
+    for result in batch_results:
+        article_index = result.get("article_index")
+        if isinstance(article_index, int) and 0 <= article_index < len(batch):
+            result['original_article'] = batch[article_index]
+    return batch_results, stats
+
+def analyze_articles_in_batch(articles, on_batch_done=None):
+    print(f"\n[단계 3/6] Gemini 배치 분석 시작 (분당 {GEMINI_REQUESTS_PER_MINUTE:g}회 제한 준수)...")
     all_results = []
-    for i in range(0, len(articles), batch_size):
-        batch = articles[i:i+batch_size]
-        print(f"  - 배치 {i//batch_size + 1}: {len(batch)}개 기사 분석 요청...")
-        try:
-            prompt = get_batch_analysis_prompt(batch)
-            response = gemini_model.generate_content(prompt)
-            api_call_counter['gemini'] += 1
-            print("    - Gemini API 호출 완료. 30초 대기...")
-            time.sleep(30)
-
-            json_text = response.text.strip().replace("```json", "").replace("```", "").strip()
-            batch_results = json.loads(json_text)
-            
-            for result in batch_results:
-                article_index = result.get("article_index")
-                if article_index is not None and 0 <= article_index < len(batch):
-                    result['original_article'] = batch[article_index]
-            
+    parse_totals = {'parsed': 0, 'malformed': 0, 'resubmitted': 0}
+    token_totals = {'input': 0, 'output': 0, 'cached': 0}
+    # 고정 개수 대신 입력/출력 토큰 예산에 맞춰 기사를 배치로 묶음
+    # system instruction도 요청마다 입력 컨텍스트에 포함되므로 배치 예산에서 제외
+    prompt_overhead_tokens = estimate_tokens(ANALYSIS_SYSTEM_INSTRUCTION) + estimate_tokens(get_batch_analysis_prompt([]))
+    packed_batches = pack_batches(articles, prompt_overhead_tokens=prompt_overhead_tokens)
+    print(f"  - {len(articles)}개 기사를 {len(packed_batches)}개 배치로 구성 (입력 예산 {ANALYSIS_INPUT_TOKEN_BUDGET:,} / 출력 예산 {ANALYSIS_OUTPUT_TOKEN_BUDGET:,} 토큰)")
+
+    # 모든 배치를 스케줄러에 먼저 제출하고, 할당량이 허용하는 대로 진행되는 호출의 응답을 완료 순서대로 처리
+    pending = {}
+    def submit(label, batch, depth):
+        pending[gemini_scheduler.submit(get_batch_analysis_prompt(batch), model=analysis_model)] = (label, batch, depth)
+
+    for batch_number, packed in enumerate(packed_batches, start=1):
+        batch = packed['articles']
+        print(f"  - 배치 {batch_number}: {len(batch)}개 기사 분석 요청... (입력 ~{packed['input_tokens']:,} 토큰, 출력 예상 ~{packed['output_tokens']:,} 토큰)")
+        submit(str(batch_number), batch, 0)
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            label, batch, depth = pending.pop(future)
+            try:
+                response = future.result()
+                usage = usage_counts(response)
+                for key in token_totals:
+                    token_totals[key] += usage[key]
+                print(f"    - 배치 {label} 토큰: 입력 {usage['input']:,} (캐시 {usage['cached']:,}), 출력 {usage['output']:,}")
+                batch_results, stats = parse_batch_response(response, batch)
+            except Exception as e:
+                print(f"  ✗ 배치 {label} 분석 실패: {e}")
+                continue
+
+            parse_totals['parsed'] += stats['parsed']
+            parse_totals['malformed'] += stats['malformed']
+            attempted = stats['parsed'] + stats['malformed'] + (1 if stats['truncated'] else 0)
+            success_rate = stats['parsed'] / attempted * 100 if attempted else 0.0
+            print(f"    - 배치 {label} 파싱: {stats['parsed']}개 성공, {stats['malformed']}개 손상{', 응답 잘림' if stats['truncated'] else ''} (성공률 {success_rate:.0f}%)")
+
+            # 응답이 손상된 경우에만 결과가 없는 기사를 재제출 (정상 응답에서 빠진 기사는 모델이 의도적으로 건너뛴 것)
+            retry_indices = set()
+            if stats['malformed'] or not stats['valid']:
+                answered = {r.get('article_index') for r in batch_results if r.get('original_article') is not None}
+                retry_indices = {i for i in range(len(batch)) if i not in answered}
+
+            if on_batch_done:
+                on_batch_done([a for i, a in enumerate(batch) if i not in retry_indices], batch_results)
             all_results.extend(batch_results)
-        except Exception as e:
-            print(f"  ✗ 배치 {i//batch_size + 1} 분석 실패: {e}")
-    print(f"총 {len(all_results)}개의 분석 결과를 얻었습니다.")
+
+            if not retry_indices:
+                continue
+            retry_articles = [batch[i] for i in sorted(retry_indices)]
+            if depth >= ANALYSIS_MAX_SPLIT_DEPTH:
+                print(f"  ✗ 배치 {label}: {len(retry_articles)}개 기사 재시도 한도 초과")
+                continue
+            # 누락된 기사만 더 작은 배치로 나누어 재제출
+            parse_totals['resubmitted'] += len(retry_articles)
+            half = (len(retry_articles) + 1) // 2
+            sub_batches = [retry_articles[:half], retry_articles[half:]] if len(retry_articles) > 1 else [retry_articles]
+            for k, sub_batch in enumerate(sub_batches, start=1):
+                if sub_batch:
+                    print(f"  - 배치 {label}.{k}: 누락된 {len(sub_batch)}개 기사 재분석 요청...")
+                    submit(f"{label}.{k}", sub_batch, depth + 1)
+
+    total_objects = parse_totals['parsed'] + parse_totals['malformed']
+    overall_rate = parse_totals['parsed'] / total_objects * 100 if total_objects else 0.0
+    print(f"총 {len(all_results)}개의 분석 결과를 얻었습니다. (파싱 성공률 {overall_rate:.0f}%, 재제출 {parse_totals['resubmitted']}개)")
+    if articles:
+        print(f"  - 토큰 사용량: 입력 {token_totals['input']:,} (캐시 {token_totals['cached']:,}), 출력 {token_totals['output']:,} / 기사당 입력 {token_totals['input'] / len(articles):,.0f} 토큰")
     return all_results
 
+def deduplicate_news(articles):
+    # 여러 피드에 재배포된 같은 기사(추적 URL/제목 변형)를 하나로 묶어 대표 기사만 분석
+    start = time.perf_counter()
+    with metrics.span("dedup", kind="step"):
+        unique_articles = deduplicate_articles(articles, entities=headline_tickers)
+    metrics.inc("articles_dropped_total", len(articles) - len(unique_articles), reason="duplicate")
+    print(f"\n[중복 제거] {len(articles)}개 → {len(unique_articles)}개 ({len(articles) - len(unique_articles)}개 중복, {time.perf_counter() - start:.3f}초)")
+    return unique_articles
+
+# 종목 별칭 색인 (처음 사용할 때 한 번만 로드)
+ticker_index = None
+
+def get_ticker_index():
+    global ticker_index
+    if ticker_index is None:
+        ticker_index = TickerIndex.load()
+    return ticker_index
+
+def headline_tickers(article):
+    # 중복 제거에서 같은 헤드라인 템플릿의 다른 회사 기사를 구분하는 데 사용
+    # (본문은 애널리스트 소속 은행 등 부수적인 종목 언급이 많아 제목만 봄)
+    return get_ticker_index().find_tickers(strip_html(article.get('title')))
+
+def prefilter_articles_by_ticker(articles):
+    # 로컬 종목 색인으로 후보 티커를 찾아 힌트로 붙이고, 종목 언급이 없는 기사는 모델에 보내지 않음
+    start = time.perf_counter()
+    ticker_index = get_ticker_index()
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    candidates = []
+    for article in articles:
+        tickers = ticker_index.find_in_article(article)
+        if tickers:
+            article['candidate_tickers'] = tickers
+            candidates.append(article)
+    elapsed = time.perf_counter() - start
+    metrics.record_span("ticker_filter", start, elapsed, kind="step")
+    metrics.inc("articles_dropped_total", len(articles) - len(candidates), reason="no_ticker_match")
+    per_article_us = elapsed / len(articles) * 1e6 if articles else 0.0
+    print(f"\n[종목 필터] {len(articles)}개 중 {len(candidates)}개 후보, {len(articles) - len(candidates)}개 제외 (기사당 {per_article_us:.0f}µs, 색인 로드 {load_seconds:.3f}초)")
+    return candidates
+
+def analyze_articles_with_cache(articles):
+    # 이전 실행에서 분석한 기사(같은 URL + 같은 내용)는 캐시 결과를 재사용하고 신규/변경 기사만 모델에 보냄
+    # 이미 Notion에 저장된 기사(같은 URL 또는 묶인 출처 중 하나)는 다시 분석해도 저장 단계에서 건너뛰므로 분석하지 않음
+    saved = [article for article in articles if is_saved_article(article)]
+    if saved:
+        metrics.inc("articles_dropped_total", len(saved), reason="already_saved")
+        articles = [article for article in articles if not is_saved_article(article)]
+    cache = AnalysisCache()
+    try:
+        evicted = cache.evict()
+        cached_results, pending_articles = cache.partition(articles)
+        print(f"\n[분석 캐시] 이미 저장됨 {len(saved)}개, 캐시 적중 {len(articles) - len(pending_articles)}개 (결과 {len(cached_results)}개), 신규/변경 {len(pending_articles)}개, 만료 삭제 {evicted}개")
+        new_results = []
+        unfinished = 0
+        if pending_articles:
+            new_results = analyze_articles_in_batch(pending_articles, on_batch_done=cache.store_batch)
+            # 실패한 배치/재시도 한도를 넘긴 기사는 캐시에 기록되지 않으므로 다시 분류해 남은 수를 셈
+            unfinished = len(cache.partition(pending_articles)[1])
+        answered = len({id(r['original_article']) for r in new_results if r.get('original_article') is not None})
+        metrics.inc("articles_processed_total", len(articles) - len(pending_articles), stage="cache_hit")
+        metrics.inc("articles_processed_total", len(pending_articles) - unfinished, stage="analyzed")
+        metrics.inc("articles_dropped_total", unfinished, reason="analysis_failed")
+        metrics.inc("articles_dropped_total", len(pending_articles) - unfinished - answered, reason="no_result")
+        return cached_results + new_results, unfinished
+    finally:
+        cache.close()
+
 def save_analysis_to_notion(analysis_results):
     print("\n[단계 4/6] Notion에 분석 결과 저장 중...")
-    count = 0
+
     for result in analysis_results:
         # 필터링: 종목이 없거나 확신도가 6 미만인 경우 제외
-        if not result.get("mentioned_tickers") or result.get("conviction_score", 0) < 6:
+        if not result.get("mentioned_tickers"):
+            metrics.inc("articles_dropped_total", reason="model_no_tickers")
+            continue
+        if result.get("conviction_score", 0) < 6:
+            metrics.inc("articles_dropped_total", reason="low_conviction")
             continue
 
         article = result.get('original_article', {})
@@ -261,112 +563,188 @@ def save_analysis_to_notion(analysis_results):
             {"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"text": {"content": "📰 기사 원문 요약"}}]}},
             {"object": "block", "type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": article.get('summary', 'N/A')[:2000]}}]}}  # Notion 2000자 제한
         ]
+        # 중복 제거 단계에서 묶인 다른 출처 기록
+        if article.get('duplicate_sources'):
+            children.append({"object": "block", "type": "heading_3", "heading_3": {"rich_text": [{"text": {"content": "🔗 다른 출처"}}]}})
+            for dup in article['duplicate_sources'][:20]:
+                children.append({"object": "block", "type": "bulleted_list_item", "bulleted_list_item": {"rich_text": [{"text": {"content": f"{dup.get('source')}: {dup.get('title')}"[:2000], "link": {"url": dup['link']} if dup.get('link') else None}}]}})
+
+        # 기사 URL(없으면 콘텐츠 해시)을 멱등 키로 사용해 재실행 시 중복 페이지 생성을 방지
+        key = article_key(article)
+        label = f"{result.get('korean_title', 'N/A')[:30]}... (확신도: {result.get('conviction_score')})"
+        lookup = {"property": "URL", "url": {"equals": article['link']}} if article.get('link') else None
+        notion_writer.create_page(NOTION_DATABASE_ID, properties, children=children, key=key, label=label, lookup=lookup,
+                                  aliases=article_aliases(article))
+
+    counts = {"created": 0, "skipped": 0, "failed": 0}
+    for outcome in notion_writer.drain():
+        counts[outcome["status"]] += 1
+        if outcome["status"] == "created":
+            metrics.inc("articles_processed_total", stage="saved")
+            print(f"  ✓ 저장: {outcome['label']}")
+        elif outcome["status"] == "skipped":
+            metrics.inc("articles_dropped_total", reason="already_saved")
+            print(f"  - 이미 저장됨: {outcome['label']}")
+        else:
+            metrics.inc("articles_dropped_total", reason="save_failed")
+            print(f"  ✗ Notion 저장 오류: {outcome['label']} - {outcome.get('error')}")
 
-        try:
-            notion.pages.create(parent={"database_id": NOTION_DATABASE_ID}, properties=properties, children=children)
-            api_call_counter['notion'] += 1
-            count += 1
-            print(f"  ✓ 저장: {result.get('korean_title', 'N/A')[:30]}... (확신도: {result.get('conviction_score')})")
-        except APIResponseError as e:
-            print(f"  ✗ Notion 저장 오류: {result.get('korean_title', '')} - {e}")
-
-    print(f"✓ 총 {count}개의 유의미한 분석을 Notion에 저장했습니다.")
+    print(f"✓ 총 {counts['created']}개의 유의미한 분석을 Notion에 저장했습니다.")
+    return counts
 
     
+def extract_prediction_record(page):
+    props = page.get("properties", {})
+    tickers_text = props.get("언급된 종목", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "")
+    predicted_sentiment = props.get("감성분석", {}).get("select", {}).get("name")
+
+    # [!] 원본 Pre-mortem 텍스트 읽어오기
+    pre_mortem_text = props.get("AI Pre-mortem", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "")
+
+    if not tickers_text or predicted_sentiment not in ["Positive", "Negative"]:
+        return None
+
+    # 첫 번째 종목만이 아니라 언급된 모든 종목을 채점
+    return {
+        "prediction_id": page.get("id"),
+        "tickers": parse_tickers(tickers_text),
+        "sentiment": predicted_sentiment,
+        "created_time": page.get("created_time") or datetime.now().astimezone().isoformat(),
+        "pre_mortem": pre_mortem_text,
+        "conviction": props.get("AI 확신 점수", {}).get("number"),
+        "url": props.get("URL", {}).get("url"),
+    }
+
+def build_feedback_rows(evaluated):
+    # 평가 엔진 결과 중 1일 수익률이 확정된 (예측, 종목) 행을 피드백 DB 속성으로 변환
+    rows = []
+    if evaluated.empty or "return_1d" not in evaluated:
+        return rows
+    for record in evaluated[evaluated["return_1d"].notna()].to_dict("records"):
+        correct = bool(record["correct_1d"])
+        horizon_notes = [
+            f"{h}일 {record[f'return_{h}d']:+.2f}%" for h in EVALUATION_HORIZONS
+            if f"return_{h}d" in record and pd.notna(record[f"return_{h}d"])
+        ]
+        if pd.notna(record.get("excess_1d")):
+            horizon_notes.append(f"{EVALUATION_BENCHMARK} 대비 {record['excess_1d']:+.2f}%p")
+        reason = "성공: 예측과 실제 움직임 일치" if correct else "실패: 예측과 실제 움직임 불일치"
+        # [!] "Pre-mortem 원본" 속성 추가 (피드백 DB에 해당 속성이 있어야 함)
+        properties = {
+            "종목": {"title": [{"text": {"content": record["ticker"]}}]},
+            "예측 방향": {"select": {"name": record["sentiment"]}},
+            "실제 변동": {"number": round(float(record["return_1d"]), 2)},
+            "예측 정확": {"checkbox": correct}, # numpy 값을 표준 bool로 변환
+            "원인 분석": {"rich_text": [{"text": {"content": f"{reason} ({', '.join(horizon_notes)})"}}]},
+            "Pre-mortem 원본": {"rich_text": [{"text": {"content": record["pre_mortem"]}}]}, # [!] Pre-mortem 데이터 복사
+            # [!] "예측 ID" 속성 추가 (피드백 DB에 해당 속성이 있어야 함). 미러에서 멱등 키를 복원하는 데 사용
+            "예측 ID": {"rich_text": [{"text": {"content": record["prediction_id"]}}]}
+        }
+        rows.append({
+            "key": f"feedback:{record['prediction_id']}:{record['ticker']}",
+            "ticker": record["ticker"],
+            "sentiment": record["sentiment"],
+            "change": float(record["return_1d"]),
+            "correct": correct,
+            "properties": properties,
+            "lookup": {"and": [
+                {"property": "예측 ID", "rich_text": {"equals": record["prediction_id"]}},
+                {"property": "종목", "title": {"equals": record["ticker"]}},
+            ]},
+        })
+    return rows
+
 def run_daily_feedback_check():
     print("\n[단계 5/6] 일일 피드백 검증 시작...")
-    yesterday = (datetime.now() - timedelta(days=1)).isoformat()
+    since = datetime.now() - timedelta(days=FEEDBACK_LOOKBACK_DAYS)
     try:
-        response = notion.databases.query(database_id=NOTION_DATABASE_ID, filter={"timestamp": "created_time", "created_time": {"on_or_after": yesterday}})
-        api_call_counter['notion'] += 1
-        predictions = response.get("results", [])
+        # 한 번의 조회(최대 100개) 대신 증분 동기화된 로컬 미러에서 전체 예측을 읽음
+        predictions = notion_mirror.pages(NOTION_DATABASE_ID, created_since=since)
         if not predictions:
-            print("  - 검증할 어제 예측이 없습니다.")
+            print(f"  - 검증할 최근 {FEEDBACK_LOOKBACK_DAYS}일 예측이 없습니다.")
             return
 
-        print(f"  - {len(predictions)}개의 어제 예측을 검증합니다.")
+        print(f"  - {len(predictions)}개의 최근 {FEEDBACK_LOOKBACK_DAYS}일 예측을 검증합니다.")
+        prediction_records = []
         for page in predictions:
             try:
-                props = page.get("properties", {})
-                tickers_text = props.get("언급된 종목", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "")
-                predicted_sentiment = props.get("감성분석", {}).get("select", {}).get("name")
-                
-                # [!] 원본 Pre-mortem 텍스트 읽어오기
-                pre_mortem_text = props.get("AI Pre-mortem", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "")
-                
-                if not tickers_text or predicted_sentiment not in ["Positive", "Negative"]:
-                    continue
-
-                ticker = tickers_text.split(",")[0].strip()
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="2d")
-                
-                if len(hist) < 2:
-                    continue
-
-                actual_change = (hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2] * 100
-                
-                correct = (predicted_sentiment == "Positive" and actual_change > 0) or (predicted_sentiment == "Negative" and actual_change < 0)
-                
-                # [!] "Pre-mortem 원본" 속성 추가 (피드백 DB에 해당 속성이 있어야 함)
-                feedback_properties = {
-                    "종목": {"title": [{"text": {"content": ticker}}]},
-                    "예측 방향": {"select": {"name": predicted_sentiment}},
-                    "실제 변동": {"number": round(actual_change, 2)},
-                    "예측 정확": {"checkbox": bool(correct)}, # numpy.bool_를 표준 bool로 변환
-                    "원인 분석": {"rich_text": [{"text": {"content": "성공: 예측과 실제 움직임 일치" if correct else "실패: 예측과 실제 움직임 불일치"}}]},
-                    "Pre-mortem 원본": {"rich_text": [{"text": {"content": pre_mortem_text}}]} # [!] Pre-mortem 데이터 복사
-                }
-                notion.pages.create(parent={"database_id": NOTION_FEEDBACK_DB_ID}, properties=feedback_properties)
-                api_call_counter['notion'] += 1
-                print(f"  ✓ 피드백 저장: {ticker} (예측: {predicted_sentiment}, 실제: {actual_change:.2f}%) -> {'성공' if correct else '실패'}")
+                record = extract_prediction_record(page)
+                if record:
+                    prediction_records.append(record)
             except Exception as e:
                 print(f"  ✗ 피드백 처리 오류: {e}")
+
+        # 종목별로 한 번씩 호출하는 대신, 고유 종목(+벤치마크)을 모아 로컬 가격 저장소를 일괄 갱신
+        unique_tickers = sorted({t for record in prediction_records for t in record["tickers"]})
+        if not unique_tickers:
+            print("  - 채점할 종목이 없습니다.")
+            return
+        fetched_rows = price_store.update(unique_tickers + [EVALUATION_BENCHMARK])
+        print(f"  - 고유 종목 {len(unique_tickers)}개 가격 갱신 (수신 {fetched_rows}행)")
+        closes = price_store.closes(unique_tickers + [EVALUATION_BENCHMARK])
+
+        evaluated = evaluate_predictions(prediction_records, closes)
+        for row in build_feedback_rows(evaluated):
+            label = f"{row['ticker']} (예측: {row['sentiment']}, 실제: {row['change']:.2f}%) -> {'성공' if row['correct'] else '실패'}"
+            notion_writer.create_page(NOTION_FEEDBACK_DB_ID, row["properties"], key=row["key"], label=label, lookup=row["lookup"])
+        counts = {"created": 0, "skipped": 0, "failed": 0}
+        for outcome in notion_writer.drain():
+            counts[outcome["status"]] += 1
+            if outcome["status"] == "created":
+                print(f"  ✓ 피드백 저장: {outcome['label']}")
+            elif outcome["status"] == "skipped":
+                print(f"  - 이미 저장된 피드백: {outcome['label']}")
+            else:
+                print(f"  ✗ 피드백 처리 오류: {outcome['label']} - {outcome.get('error')}")
+        return counts
     except APIResponseError as e:
-        print(f"✗ 어제 분석 데이터 조회 실패: {e}")
+        print(f"✗ 최근 분석 데이터 조회 실패: {e}")
+        raise
+
+def run_accuracy_backfill(days=90):
+    # 과거 예측 전체를 한 번에 채점해 기간별 정확도를 확인 (Notion에는 쓰지 않음)
+    print(f"\n[추가 작업] 최근 {days}일 예측 정확도 백필 시작...")
+    since = datetime.now() - timedelta(days=days)
+    pages = iter_database_query(notion_writer, NOTION_DATABASE_ID, filter={"timestamp": "created_time", "created_time": {"on_or_after": to_notion_timestamp(since)}})
+    records = [r for r in (extract_prediction_record(page) for page in pages) if r]
+    tickers = sorted({t for record in records for t in record["tickers"]})
+    if not tickers:
+        print("  - 채점할 예측이 없습니다.")
+        return {}
+    price_store.update(tickers + [EVALUATION_BENCHMARK], lookback_days=days + 10)
+    evaluated = evaluate_predictions(records, price_store.closes(tickers + [EVALUATION_BENCHMARK]))
+    summary = summarize_accuracy(evaluated)
+    for horizon, stats in summary.items():
+        accuracy = f"{stats['accuracy']:.1f}%" if stats['accuracy'] is not None else "N/A"
+        print(f"  - {horizon}: {stats['scored']}건 채점, 정확도 {accuracy}")
+    return summary
 
 def run_weekly_report_generation():
     print("\n[추가 작업] 주간 피드백 보고서 생성 시작...")
-    last_week = (datetime.now() - timedelta(days=7)).isoformat()
+    # 지난 7일간 채점이 끝난 예측(피드백 기간과 동일: 8일 전 ~ 1일 전 작성)을 로컬 미러에서 읽어 직접 집계
+    since = datetime.now() - timedelta(days=8)
     try:
-        response = notion.databases.query(database_id=NOTION_FEEDBACK_DB_ID, filter={"timestamp": "created_time", "created_time": {"on_or_after": last_week}})
-        api_call_counter['notion'] += 1
-        feedback_logs = response.get("results", [])
-        if not feedback_logs:
-            print("  - 분석할 피드백 로그가 없습니다.")
+        records = [r for r in (extract_prediction_record(page) for page in notion_mirror.pages(NOTION_DATABASE_ID, created_since=since)) if r]
+        tickers = sorted({t for record in records for t in record["tickers"]})
+        if not tickers:
+            print("  - 분석할 예측 데이터가 없습니다.")
             return
+        price_store.update(tickers + [EVALUATION_BENCHMARK])
+        evaluated = evaluate_predictions(records, price_store.closes(tickers + [EVALUATION_BENCHMARK]))
 
-        successful_predictions = []
-        failed_predictions = []
-        for page in feedback_logs:
-            props = page.get("properties", {})
-            prediction = {
-                "ticker": props.get("종목", {}).get("title", [{}])[0].get("text", {}).get("content", ""),
-                "prediction": props.get("예측 방향", {}).get("select", {}).get("name"),
-                "actual_change": props.get("실제 변동", {}).get("number"),
-                "reason": props.get("원인 분석", {}).get("rich_text", [{}])[0].get("text", {}).get("content", ""),
-                "pre_mortem": props.get("Pre-mortem 원본", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "") # [!] Pre-mortem 데이터 추가
-            }
-            if props.get("예측 정확", {}).get("checkbox"):
-                successful_predictions.append(prediction)
-            else:
-                failed_predictions.append(prediction)
-        
-        print(f"  - 지난 주 예측 결과: {len(successful_predictions)}개 성공, {len(failed_predictions)}개 실패")
-        
-        # 데이터가 없으면 리포트 생성 스킵
-        if not successful_predictions and not failed_predictions:
+        # 예측 수가 늘어도 프롬프트 크기가 일정하도록 종목/방향/출처별 정확도, 확신도 보정표, 실패 유형만 전달
+        aggregates = build_weekly_aggregates(evaluated, EVALUATION_HORIZONS)
+        if not aggregates:
             print("  - 분석할 피드백 데이터가 충분하지 않습니다. 리포트를 건너뜁니다.")
             return
+        print(f"  - 지난 주 예측 결과: {aggregates['correct']}개 성공, {aggregates['total'] - aggregates['correct']}개 실패 (실패 표본 {len(aggregates['failure_samples'])}개)")
 
-        prompt = get_weekly_feedback_and_prompt_improvement_prompt(failed_predictions, successful_predictions)
-        response = gemini_model.generate_content(prompt)
-        api_call_counter['gemini'] += 1
-        print("    - Gemini API 호출 완료. 30초 대기...")
-        time.sleep(30)
+        prompt = get_weekly_feedback_and_prompt_improvement_prompt(aggregates)
+        print(f"    - 보고서 프롬프트 크기: ~{estimate_tokens(prompt):,} 토큰")
+        response = gemini_scheduler.generate(prompt)
+        print("    - Gemini API 호출 완료.")
 
-        json_text = response.text.strip().replace("```json", "").replace("```", "").strip()
-        report_data = json.loads(json_text)
+        report_data = json.loads(strip_code_fences(response.text))
 
         # 개선이 필요한 경우에만 보고서 생성
         improvement = report_data.get("actionable_improvement", {})
@@ -386,42 +764,208 @@ def run_weekly_report_generation():
                 "성공 비결 분석": {"rich_text": [{"text": {"content": success.get("common_pattern", "N/A")}}]},
                 "개선된 프롬프트 제안": {"rich_text": [{"text": {"content": improvement.get("solution", "N/A")}}]}
             }
-            notion.pages.create(parent={"database_id": NOTION_REPORT_DB_ID}, properties=properties)
-            api_call_counter['notion'] += 1
-            print(f"✓ 주간 피드백 보고서를 Notion에 저장했습니다.")
+            notion_writer.create_page(NOTION_REPORT_DB_ID, properties, key=f"report:{datetime.now().strftime('%Y-%m-%d')}", label=report_title,
+                                      lookup={"property": "보고서 기간", "title": {"equals": report_title}})
+            outcome = notion_writer.drain()[0]
+            if outcome["status"] == "failed":
+                raise RuntimeError(outcome.get("error"))
+            if outcome["status"] == "skipped":
+                print("  - 오늘 보고서가 이미 저장되어 있습니다.")
+            else:
+                print(f"✓ 주간 피드백 보고서를 Notion에 저장했습니다.")
         else:
             print("  - 정확도가 양호하거나 실패가 무작위적입니다. 보고서 생성을 생략합니다.")
 
     except Exception as e:
         print(f"  ✗ 주간 보고서 생성 실패: {e}")
+        raise
 
 # --- 9. 메인 실행 로직 ---
-def main():
+def collect_candidate_articles():
+    # 수집 → 중복 제거 → 종목 필터를 거친 분석 후보 기사
+    articles = fetch_news_from_rss(RSS_FEEDS)
+    if articles:
+        articles = deduplicate_news(articles)
+        if TICKER_FILTER_ENABLED:
+            articles = prefilter_articles_by_ticker(articles)
+    return articles
+
+def stage_fetch(journal):
+    articles = collect_candidate_articles()
+    # 조건부 GET 때문에 다시 수집하면 304로 비어 있을 수 있으므로 수집한 기사를 저널에 보관
+    journal.save_articles(articles)
+    return {"articles": len(articles)}
+
+def stage_analyze(journal):
+    articles = journal.load_articles()
+    if articles is None:
+        raise RuntimeError("저널에 수집된 기사가 없습니다. fetch 단계를 먼저 실행하세요.")
+    results, unfinished = analyze_articles_with_cache(articles) if articles else ([], 0)
+    journal.save_results(results)
+    # 분석 결과가 바뀌었으므로 이전에 완료된 저장 단계도 다시 실행 (이미 저장된 페이지는 쓰기 기록으로 건너뜀)
+    journal.reset("save")
+    # 분석하지 못한 기사가 남으면 실패로 기록해 --resume 시 남은 기사만 다시 분석
+    return {"results": len(results), "failed": unfinished}
+
+def stage_save(journal):
+    results = journal.load_results()
+    if results is None:
+        raise RuntimeError("저널에 분석 결과가 없습니다. analyze 단계를 먼저 실행하세요.")
+    return save_analysis_to_notion(results) if results else {"created": 0, "skipped": 0, "failed": 0}
+
+def stage_feedback(journal):
+    return run_daily_feedback_check()
+
+def stage_report(journal):
+    run_weekly_report_generation()
+
+def run_stage(journal, stage, func):
+    """단계를 실행하고 결과를 저널에 기록한다. 이미 완료된 단계(--resume)는 건너뛴다. 성공 여부를 반환한다."""
+    if journal.is_done(stage):
+        print(f"\n[저널] {stage} 단계는 이미 완료되어 건너뜁니다.")
+        return True
+    journal.start(stage)
     try:
-        check_notion_connections()
-        
+        with metrics.span(stage):
+            summary = func(journal)
+    except Exception as e:
+        print(f"\n✗ {stage} 단계 실패: {e}")
+        journal.fail(stage, e)
+        return False
+    if summary and summary.get("failed"):
+        journal.fail(stage, f"{summary['failed']}건 실패", summary)
+        return False
+    journal.finish(stage, summary)
+    return True
+
+def run_streaming_daemon():
+    # 하루 한 번 대신 피드를 계속 폴링해 새 기사를 몇 분 안에 분석/저장하고,
+    # 주간 보고서와 일일 피드백은 같은 프로세스 안에서 예약 작업으로 실행
+    def process_batch(articles):
+        with metrics.span("stream_batch"):
+            results, _ = analyze_articles_with_cache(articles)
+            if results:
+                save_analysis_to_notion(results)
+
+    # 폴링마다 새 기사만 들어오므로, 이전 폴링에서 처리한 기사의 재배포본도 여기서 걸러냄
+    recent_articles = RecentArticleIndex(entities=headline_tickers)
+
+    def poll():
+        articles = collect_candidate_articles()
+        fresh = recent_articles.filter_new(articles)
+        if len(fresh) < len(articles):
+            metrics.inc("articles_dropped_total", len(articles) - len(fresh), reason="duplicate")
+            print(f"  - 이전 폴링과 중복된 기사 {len(articles) - len(fresh)}개 제외")
+        return fresh
+
+    def report_job():
+        sync_notion_mirror()
+        run_weekly_report_generation()
+
+    def feedback_job():
+        sync_notion_mirror()
+        run_daily_feedback_check()
+
+    daemon = StreamingDaemon(
+        poll=poll,
+        process_batch=process_batch,
+        key=lambda article: canonical_url(article.get('link')) or content_hash(article),
+        jobs=[
+            DailyJob("report", report_job, at_utc=STREAM_JOBS_AT_UTC, weekdays=[0]),
+            DailyJob("feedback", feedback_job, at_utc=STREAM_JOBS_AT_UTC, weekdays=range(5)),
+        ],
+    )
+    daemon.run()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="뉴스 기반 시장 분석 파이프라인")
+    parser.add_argument("--resume", action="store_true",
+                        help="직전 실행 저널을 이어서 완료된 단계를 건너뜀")
+    parser.add_argument("--daemon", action="store_true",
+                        help="상시 실행 모드: 피드를 주기적으로 폴링해 새 기사를 바로 분석/저장")
+    parser.add_argument("--backfill", type=int, metavar="DAYS",
+                        help="최근 DAYS일 예측 전체를 기간별로 채점해 정확도만 출력 (Notion에는 쓰지 않음)")
+    parser.add_argument("--stages", type=lambda value: [s.strip() for s in value.split(",") if s.strip()],
+                        help=f"실행할 단계 (쉼표 구분: {','.join(PIPELINE_STAGES)}). 기본값은 월요일에만 report 포함")
+    args = parser.parse_args(argv)
+    if args.stages:
+        unknown = set(args.stages) - set(PIPELINE_STAGES)
+        if unknown:
+            parser.error(f"알 수 없는 단계: {', '.join(sorted(unknown))}")
+    else:
+        args.stages = [s for s in PIPELINE_STAGES if s != "report" or datetime.now().weekday() == 0]
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if notion_writer is None:
+        init_clients()
+    journal = None
+    try:
+        with metrics.span("connect"):
+            check_notion_connections()
+        with metrics.span("mirror_sync"):
+            sync_notion_mirror()
+        if args.daemon:
+            run_streaming_daemon()
+            return
+        if args.backfill:
+            with metrics.span("backfill"):
+                run_accuracy_backfill(args.backfill)
+            return
+
+        journal = RunJournal(resume=args.resume)
+        stages = args.stages
+        print(f"\n[저널] 실행 {journal.run_id}{' (이어서 실행)' if journal.resumed else ''}: {', '.join(stages)}")
+
         # 월요일에만 주간 보고서 생성
-        if datetime.now().weekday() == 0:
-            run_weekly_report_generation()
+        if "report" in stages:
+            run_stage(journal, "report", stage_report)
 
         # 매일 실행되는 분석 및 피드백
-        run_daily_feedback_check()
-        articles = fetch_news_from_rss(RSS_FEEDS)
-        if articles:
-            analysis_results = analyze_articles_in_batch(articles)
-            if analysis_results:
-                save_analysis_to_notion(analysis_results)
-        
+        fetched = run_stage(journal, "fetch", stage_fetch) if "fetch" in stages else True
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis") as background:
+            # Gemini 분석은 백그라운드에서 할당량에 맞춰 진행하고, 그동안 피드백 검증(Notion/yfinance)을 수행
+            # (피드백 조회가 오늘 저장할 예측을 포함하지 않도록 Notion 저장은 피드백 이후에 실행)
+            analysis_future = None
+            if "analyze" in stages and fetched:
+                analysis_future = background.submit(run_stage, journal, "analyze", stage_analyze)
+            if "feedback" in stages:
+                run_stage(journal, "feedback", stage_feedback)
+            if analysis_future:
+                analysis_future.result()
+        # 분석이 일부 실패해도 얻은 결과는 저장 (남은 기사는 --resume으로 이어서 분석).
+        # 분석 결과가 하나도 없으면 저장 단계를 완료로 기록하지 않도록 실행하지 않음
+        has_results = (journal.summary("analyze") or {}).get("results")
+        if "save" in stages and ("analyze" not in stages or has_results):
+            run_stage(journal, "save", stage_save)
+
     except Exception as e:
         print(f"\n스크립트 실행 중 심각한 오류 발생: {e}")
     finally:
         print("\n" + "=" * 60)
         print("모든 작업이 완료되었습니다.")
         print("API 호출 요약:")
-        print(f"- Gemini: {api_call_counter['gemini']}회")
-        print(f"- Notion: {api_call_counter['notion']}회")
-        print(f"총 호출: {sum(api_call_counter.values())}회")
+        calls = {service: metrics.counter("api_calls_total", service=service) for service in ("gemini", "notion", "rss", "prices")}
+        retries = {service: metrics.counter("retries_total", service=service) for service in ("gemini", "notion")}
+        print(f"- Gemini: {calls['gemini']}회 (재시도 {retries['gemini']}회)")
+        print(f"- Notion: {calls['notion']}회 (재시도 {retries['notion']}회)")
+        print(f"- RSS: {calls['rss']}회, 가격 조회: {calls['prices']}회")
+        print(f"총 호출: {sum(calls.values())}회")
+        print(f"Gemini 토큰: 입력 {metrics.counter('gemini_tokens_total', type='input'):,} (캐시 {metrics.counter('gemini_tokens_total', type='cached'):,}), 출력 {metrics.counter('gemini_tokens_total', type='output'):,}")
+        for stage, seconds in metrics.stage_durations().items():
+            print(f"- {stage}: {seconds:.2f}초")
+        if journal:
+            print(f"실행 저널: {journal.describe()}")
         print("=" * 60)
+        close_clients()
+        try:
+            deltas = metrics.write()
+            print(f"실행 지표 저장: {METRICS_PATH}")
+            for stage, delta in deltas.items():
+                print(f"  - {stage}: 직전 실행 대비 {delta:+.2f}초")
+        except OSError as e:
+            print(f"✗ 실행 지표 저장 실패: {e}")
 
 if __name__ == "__main__":
     main()
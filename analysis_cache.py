@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from local_state import state_path
+from text_utils import canonical_url, content_hash
+
+# --- 실행 간 Gemini 분석 결과 캐시 ---
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH") or state_path("analysis_cache.sqlite3")
+ANALYSIS_CACHE_TTL_DAYS = float(os.getenv("ANALYSIS_CACHE_TTL_DAYS", "7"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))
+
+
+class AnalysisCache:
+    """정규화된 URL + 콘텐츠 해시를 키로 기사별 Gemini 분석 결과를 저장한다.
+
+    결과가 None으로 저장된 항목은 "분석했지만 결과 없음"(종목 미언급 등)을 의미하며,
+    다시 모델에 보내지 않는다.
+    """
+
+    def __init__(self, path=ANALYSIS_CACHE_PATH, ttl_days=ANALYSIS_CACHE_TTL_DAYS,
+                 max_entries=ANALYSIS_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                url_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                result_json TEXT,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def partition(self, articles):
+        """(캐시된 분석 결과 목록, 모델에 보내야 할 신규/변경 기사 목록)을 반환한다."""
+        cached_results = []
+        pending = []
+        now = time.time()
+        with self._lock:
+            for article in articles:
+                row = self._conn.execute(
+                    "SELECT content_hash, result_json, created_at FROM analysis_cache WHERE url_key = ?",
+                    (canonical_url(article.get('link')),)
+                ).fetchone()
+                if row is None or row[0] != content_hash(article) or now - row[2] > self.ttl_seconds:
+                    pending.append(article)
+                    continue
+                self._conn.execute(
+                    "UPDATE analysis_cache SET last_used_at = ? WHERE url_key = ?",
+                    (now, canonical_url(article.get('link')))
+                )
+                if row[1] is not None:
+                    result = json.loads(row[1])
+                    result['original_article'] = article
+                    result['from_cache'] = True
+                    cached_results.append(result)
+            self._conn.commit()
+        return cached_results, pending
+
+    def store_batch(self, batch, batch_results):
+        """분석이 끝난 기사들의 결과를 저장한다. 결과가 없는 기사는 None으로 기록한다."""
+        results_by_article = {}
+        for result in batch_results:
+            article = result.get('original_article')
+            if article is not None:
+                results_by_article[id(article)] = {
+                    k: v for k, v in result.items() if k not in ('original_article', 'from_cache')
+                }
+
+        now = time.time()
+        with self._lock:
+            for article in batch:
+                result = results_by_article.get(id(article))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache VALUES (?, ?, ?, ?, ?)",
+                    (
+                        canonical_url(article.get('link')),
+                        content_hash(article),
+                        json.dumps(result, ensure_ascii=False) if result is not None else None,
+                        now,
+                        now,
+                    )
+                )
+            self._conn.commit()
+
+    def evict(self):
+        """TTL이 지난 항목을 지우고, 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 지운다."""
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._conn.execute(
+                """DELETE FROM analysis_cache WHERE url_key IN (
+                       SELECT url_key FROM analysis_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+        return expired + overflow
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,62 @@
+"""중복 제거 회귀 확인: 합성 기사로 서로 다른 회사의 기사가 묶이지 않는지와 처리 시간을 확인한다.
+
+    python -m benchmarks.check_dedup --articles 4000 --seed 1
+
+같은 헤드라인 템플릿을 쓴 다른 회사 기사(예: "DoorDash said enterprise margins expanded 5.6 points..."와
+"Qualcomm said consumer margins expanded 5.6 points...")가 한 클러스터로 묶이면 실패한다.
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from dedup import find_duplicate_clusters
+from text_utils import strip_html
+from ticker_index import TickerIndex
+from benchmarks.fakes import generate_feed_articles
+
+# 회귀 사례: seed=1, 4000개에서 한때 하나로 묶였던 기사 쌍
+REGRESSION_PAIR = ("DoorDash said enterprise margins expanded 5.6 points", "Qualcomm said consumer margins expanded 5.6 points")
+
+
+def _fixture_company(article):
+    # 합성 기사 URL의 첫 경로(티커 소문자, 거시 뉴스는 "macro")
+    return article["link"].split("/")[3]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="중복 제거가 다른 회사 기사를 묶지 않는지 확인")
+    parser.add_argument("--articles", type=int, default=4000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="허용할 최대 처리 시간(초)")
+    args = parser.parse_args(argv)
+
+    articles = [a for feed in generate_feed_articles(args.articles, seed=args.seed).values() for a in feed]
+    index = TickerIndex.load()
+    start = time.perf_counter()
+    clusters = find_duplicate_clusters(articles, entities=lambda a: index.find_tickers(strip_html(a.get("title"))))
+    elapsed = time.perf_counter() - start
+
+    failures = []
+    for cluster in clusters:
+        companies = {_fixture_company(articles[i]) for i in cluster} - {"macro"}
+        if len(companies) > 1:
+            failures.append([articles[i]["title"] for i in cluster])
+    pair = [i for i, a in enumerate(articles) if a["title"].startswith(REGRESSION_PAIR)]
+    if len(pair) == 2 and any(pair[0] in cluster and pair[1] in cluster for cluster in clusters):
+        failures.append([articles[i]["title"] for i in pair])
+
+    print(f"기사 {len(articles)}개 → 클러스터 {len(clusters)}개, {elapsed:.3f}초 (한도 {args.max_seconds:.1f}초)")
+    for titles in failures:
+        print(f"  ✗ 다른 회사 기사가 묶임: {titles}")
+    if failures or elapsed > args.max_seconds:
+        sys.exit(1)
+    print("✓ 다른 회사 기사가 묶이지 않았습니다.")
+
+
+if __name__ == "__main__":
+    main()
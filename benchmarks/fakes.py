@@ -0,0 +1,350 @@
+import re
+import csv
+import json
+import time
+import random
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
+from uuid import uuid4
+
+import httpx
+from notion_client.errors import APIResponseError, APIErrorCode
+
+from notion_sync import to_notion_timestamp
+from text_utils import estimate_tokens
+from ticker_index import TICKER_ALIASES_PATH
+
+# --- 외부 서비스(RSS, Gemini, Notion)의 로컬 대역 (벤치마크용) ---
+
+_EVENTS = [
+    "reported quarterly revenue of ${revenue} billion, {direction} estimates by {pct}%",
+    "raised its full-year guidance to ${revenue} billion after {pct}% growth in {segment}",
+    "cut its outlook as {segment} sales fell {pct}% year over year",
+    "announced a ${revenue} billion buyback program alongside a {pct}% dividend increase",
+    "won a ${revenue} billion contract to supply {segment} equipment through {year}",
+    "disclosed a regulatory probe into its {segment} business, shares moved {pct}% after hours",
+    "agreed to acquire a {segment} startup for ${revenue} billion in cash and stock",
+    "said {segment} margins expanded {pct} points on lower input costs",
+]
+_SEGMENTS = ["cloud", "advertising", "data center", "consumer", "enterprise", "automotive",
+             "semiconductor", "streaming", "payments", "healthcare", "energy", "logistics"]
+_ANALYST_NOTES = [
+    "Analysts at {bank} moved their price target to ${target}.",
+    "{bank} reiterated its rating, citing {segment} momentum.",
+    "Options volume reached {volume} thousand contracts by midday.",
+    "The stock has moved {pct}% since the start of the quarter.",
+    "Management will host an investor day in {month}.",
+]
+_BANKS = ["Morgan Stanley", "Goldman Sachs", "JPMorgan", "Bank of America", "Citi", "UBS", "Jefferies", "Barclays"]
+_MONTHS = ["January", "March", "May", "June", "September", "November"]
+# 종목 언급이 없는 기사 (종목 필터에서 걸러져야 하는 잡음)
+_MACRO_TOPICS = [
+    "Treasury yields {direction} as traders weigh the next central bank decision",
+    "Oil prices swing {pct}% on shifting supply forecasts",
+    "Consumer confidence index lands at {volume}, {direction} forecasts",
+    "Housing starts {direction} expectations for the {ordinal} straight month",
+]
+
+
+def load_company_names(path=TICKER_ALIASES_PATH):
+    # 종목 별칭 CSV의 첫 번째 별칭(회사 이름)을 기사 본문에 사용
+    with open(path, "r", encoding="utf-8") as f:
+        return [(row["ticker"], row["aliases"].split("|")[0]) for row in csv.DictReader(f) if row.get("aliases")]
+
+
+def generate_feed_articles(total, feeds=4, duplicate_ratio=0.1, noise_ratio=0.15, seed=0):
+    """재현 가능한 합성 기사를 피드별로 나누어 만든다.
+
+    duplicate_ratio만큼은 다른 피드의 기사를 추적 파라미터/제목 접두어만 바꿔 재배포한 것이고,
+    noise_ratio만큼은 종목 언급이 없는 거시 뉴스다. 반환값은 {피드 이름: [기사 dict]}이다.
+    """
+    rng = random.Random(seed)
+    companies = load_company_names()
+    now = datetime.now(timezone.utc)
+    names = [f"Fixture {i + 1}" for i in range(feeds)]
+    by_feed = {name: [] for name in names}
+    originals = []
+    for i in range(total):
+        feed = names[i % feeds]
+        fill = {
+            "revenue": f"{rng.uniform(0.5, 120):.1f}", "pct": f"{rng.uniform(0.3, 35):.1f}",
+            "direction": rng.choice(["beating", "missing", "topping", "trailing"]),
+            "segment": rng.choice(_SEGMENTS), "year": rng.randint(2026, 2032), "bank": rng.choice(_BANKS),
+            "target": rng.randint(20, 900), "volume": rng.randint(10, 999), "month": rng.choice(_MONTHS),
+            "ordinal": rng.choice(["second", "third", "fourth"]),
+        }
+        if originals and rng.random() < duplicate_ratio:
+            source = rng.choice(originals)
+            article = dict(source, title=f"UPDATE: {source['title']}",
+                           link=f"{source['link']}?utm_source={feed.replace(' ', '').lower()}&utm_medium=rss")
+        elif rng.random() < noise_ratio:
+            headline = rng.choice(_MACRO_TOPICS).format(**fill)
+            article = {
+                "title": headline,
+                "link": f"https://fixture.example.com/macro/{i}",
+                "summary": f"{headline}. Traders expect volatility to stay elevated into {fill['month']}.",
+            }
+        else:
+            ticker, company = rng.choice(companies)
+            event = rng.choice(_EVENTS).format(**fill)
+            notes = " ".join(note.format(**fill) for note in rng.sample(_ANALYST_NOTES, 2))
+            article = {
+                "title": f"{company} {event.split(',')[0]}",
+                "link": f"https://fixture.example.com/{ticker.lower()}/{i}",
+                "summary": f"{company} ({ticker}) {event}. {notes} Report #{i} from {feed}.",
+            }
+            originals.append(article)
+        article["published"] = format_datetime(now - timedelta(minutes=i))
+        by_feed[feed].append(article)
+    return by_feed
+
+
+def render_rss(name, articles):
+    items = "".join(
+        f"<item><title>{escape(a['title'])}</title><link>{escape(a['link'])}</link>"
+        f"<description>{escape(a['summary'])}</description><pubDate>{a['published']}</pubDate></item>"
+        for a in articles
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{escape(name)}</title>'
+            f"<link>https://fixture.example.com/</link><description>fixture</description>{items}</channel></rss>")
+
+
+class RSSFixtureServer:
+    """합성 기사를 RSS 2.0으로 제공하는 로컬 HTTP 서버. ETag 조건부 요청에는 304로 응답한다."""
+
+    def __init__(self, feeds, latency=0.0, host="127.0.0.1"):
+        self.latency = latency
+        self.requests = 0
+        self._documents = {}
+        for i, (name, articles) in enumerate(feeds.items()):
+            body = render_rss(name, articles).encode("utf-8")
+            self._documents[f"/feed/{i}.xml"] = (name, body, f'"fixture-{i}-{len(body)}"')
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                document = server._documents.get(self.path)
+                if document is None:
+                    self.send_error(404)
+                    return
+                _, body, etag = document
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="rss-fixture", daemon=True)
+
+    @property
+    def feeds(self):
+        """{피드 이름: URL} (RSS_FEEDS와 같은 형태)."""
+        host, port = self._httpd.server_address[:2]
+        return {name: f"http://{host}:{port}{path}" for path, (name, _, _) in self._documents.items()}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+_ARTICLE_RE = re.compile(r'<article index="(\d+)">(.*?)</article>', re.DOTALL)
+_CANDIDATES_RE = re.compile(r"<candidate_tickers>(.*?)</candidate_tickers>")
+
+
+class GeminiStub:
+    """google.generativeai.GenerativeModel 대역.
+
+    분석 프롬프트의 <article index="N">마다 미리 정해진 형태의 결과를 JSON 배열로 돌려주고
+    (후보 티커를 그대로 mentioned_tickers로 사용), usage_metadata에는 추정 토큰 수를 채운다.
+    지연 시간은 호출당 latency + 기사당 latency_per_article초다. 분석 프롬프트가 아니면 주간 보고서
+    형식으로 응답하며, report_needed가 참이면 개선이 필요하다고 답해 보고서 저장까지 이어지게 한다.
+    """
+
+    def __init__(self, model_name, system_instruction=None, latency=0.5, latency_per_article=0.0, seed=0,
+                 report_needed=True):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.latency = latency
+        self.latency_per_article = latency_per_article
+        self.report_needed = report_needed
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, **options):
+        """init_clients(model_factory=...)에 넘길 생성 함수."""
+        return lambda model_name, **kwargs: cls(model_name, **kwargs, **options)
+
+    def generate_content(self, prompt):
+        articles = _ARTICLE_RE.findall(prompt)
+        with self._lock:
+            self.calls += 1
+            draws = [(self._rng.choice(["Positive", "Negative", "Neutral"]), self._rng.randint(4, 9)) for _ in articles]
+        time.sleep(self.latency + self.latency_per_article * len(articles))
+
+        if articles:
+            payload = []
+            for (index, body), (sentiment, conviction) in zip(articles, draws):
+                candidates = _CANDIDATES_RE.search(body)
+                tickers = [t.strip() for t in candidates.group(1).split(",")] if candidates else []
+                payload.append({
+                    "article_index": int(index),
+                    "korean_title": f"합성 기사 {index} 분석",
+                    "mentioned_tickers": tickers,
+                    "sentiment": sentiment,
+                    "conviction_score": conviction,
+                    "summary": "1) 핵심 사건: 합성 데이터.\n2) 주가 영향 논리: 합성 데이터.\n3) 시간 프레임: 단기",
+                    "pre_mortem_risks": "1) 실적 발표 일정 변경 가능성.\n2) 경쟁사 가격 인하.\n3) 거시경제 변동성.",
+                })
+        else:
+            # 분석 프롬프트가 아니면 주간 보고서 형식으로 응답
+            payload = {
+                "weekly_summary": {"accuracy_rate": "50.0%", "key_takeaway": "합성 데이터 요약"},
+                "failure_analysis": {"recurring_theme": "Ignored Risk", "examples": [], "root_cause": "합성 데이터"},
+                "success_analysis": {"common_pattern": "합성 데이터", "examples": []},
+                "actionable_improvement": {
+                    "needed": self.report_needed,
+                    "problem": "합성 데이터",
+                    "solution": "합성 프롬프트 개선안" if self.report_needed else "",
+                    "expected_impact": "합성 데이터",
+                },
+            }
+        text = json.dumps(payload, ensure_ascii=False)
+        input_tokens = estimate_tokens(prompt) + estimate_tokens(self.system_instruction)
+        output_tokens = estimate_tokens(text)
+        usage = SimpleNamespace(prompt_token_count=input_tokens, candidates_token_count=output_tokens,
+                                cached_content_token_count=0, total_token_count=input_tokens + output_tokens)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+def _api_error(status, code, message, headers=None):
+    return APIResponseError(httpx.Response(status, headers=headers or {}), message, code)
+
+
+class InMemoryNotion:
+    """notion_client.Client 대역 (databases.retrieve/query, pages.create).
+
+    페이지는 메모리에 보관하고, 조회는 created_time/last_edited_time 필터, url/rich_text/title 속성의
+    equals 필터와 이들의 and/or 조합, 커서 페이지네이션을 지원한다.
+    최근 1초간 요청이 requests_per_second를 넘으면 429(Retry-After)로 응답한다.
+    """
+
+    def __init__(self, database_ids, requests_per_second=3.0, latency=0.0, retry_after=1):
+        self.requests_per_second = requests_per_second
+        self.latency = latency
+        self.retry_after = retry_after
+        self.stats = {"requests": 0, "rate_limited": 0}
+        self.pages_by_db = {database_id: [] for database_id in database_ids}
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.databases = DatabasesEndpoint(self)
+        self.pages = PagesEndpoint(self)
+
+    def _request(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            self.stats["requests"] += 1
+            if len(self._recent) >= self.requests_per_second:
+                self.stats["rate_limited"] += 1
+                raise _api_error(429, APIErrorCode.RateLimited, "Rate limited",
+                                 headers={"Retry-After": str(self.retry_after)})
+            self._recent.append(now)
+        time.sleep(self.latency)
+
+    def _database(self, database_id):
+        pages = self.pages_by_db.get(database_id)
+        if pages is None:
+            raise _api_error(404, APIErrorCode.ObjectNotFound, f"Could not find database with ID: {database_id}")
+        return pages
+
+    def add_page(self, database_id, properties, created_time=None):
+        """속도 제한 없이 페이지를 직접 넣는다 (이전 실행의 예측 등 초기 데이터용)."""
+        timestamp = to_notion_timestamp(created_time or datetime.now(timezone.utc))
+        page = {
+            "object": "page", "id": str(uuid4()), "created_time": timestamp, "last_edited_time": timestamp,
+            "archived": False, "parent": {"database_id": database_id}, "properties": properties,
+        }
+        with self._lock:
+            self._database(database_id).append(page)
+        return page
+
+
+def _property_text(prop):
+    if "url" in prop:
+        return prop["url"]
+    for kind in ("title", "rich_text"):
+        if kind in prop:
+            return "".join(part.get("text", {}).get("content", "") for part in prop[kind])
+    return None
+
+
+def _matches(page, filter):
+    if "and" in filter:
+        return all(_matches(page, sub) for sub in filter["and"])
+    if "or" in filter:
+        return any(_matches(page, sub) for sub in filter["or"])
+    if "timestamp" in filter:
+        field = filter["timestamp"]
+        since = filter[field].get("on_or_after")
+        return not since or page[field] >= to_notion_timestamp(since)
+    for kind in ("url", "rich_text", "title"):
+        if kind in filter:
+            prop = page["properties"].get(filter["property"])
+            return prop is not None and _property_text(prop) == filter[kind]["equals"]
+    raise ValueError(f"지원하지 않는 필터: {filter}")
+
+
+class DatabasesEndpoint:
+    def __init__(self, client):
+        self.client = client
+
+    def retrieve(self, database_id):
+        self.client._request()
+        self.client._database(database_id)
+        return {"object": "database", "id": database_id}
+
+    def query(self, database_id, filter=None, sorts=None, start_cursor=None, page_size=100):
+        self.client._request()
+        with self.client._lock:
+            pages = list(self.client._database(database_id))
+        if filter:
+            pages = [page for page in pages if _matches(page, filter)]
+        for sort in reversed(sorts or []):
+            pages.sort(key=lambda page: page[sort["timestamp"]], reverse=sort.get("direction") == "descending")
+        offset = int(start_cursor or 0)
+        chunk = pages[offset:offset + page_size]
+        has_more = offset + page_size < len(pages)
+        return {"object": "list", "results": chunk, "has_more": has_more,
+                "next_cursor": str(offset + page_size) if has_more else None}
+
+
+class PagesEndpoint:
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, parent, properties, children=None):
+        self.client._request()
+        return self.client.add_page(parent["database_id"], properties)
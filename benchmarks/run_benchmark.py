@@ -0,0 +1,219 @@
+"""오프라인 벤치마크: RSS, Gemini, Notion, yfinance를 로컬 대역으로 바꿔 파이프라인 전체를 실행하고
+기사 수별 처리량과 단계별 지연 시간을 측정한다.
+
+    python -m benchmarks.run_benchmark --sizes 10,100,1000 --output benchmark_results.json
+    python -m benchmarks.run_benchmark --sizes 100 --stages fetch,analyze,save,feedback,report
+
+각 크기는 별도 프로세스와 임시 상태 디렉터리에서 실행된다 (모듈 설정이 import 시점의 환경 변수를
+읽고, 분석 캐시/Notion 쓰기 기록이 실행 간에 재사용되지 않도록 하기 위함).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BENCHMARK_STAGES = "fetch,analyze,save,feedback"
+DATABASE_IDS = {
+    "NOTION_DATABASE_ID": "benchmark-analysis-db",
+    "NOTION_FEEDBACK_DB_ID": "benchmark-feedback-db",
+    "NOTION_REPORT_DB_ID": "benchmark-report-db",
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 대역을 이용한 파이프라인 오프라인 벤치마크")
+    parser.add_argument("--sizes", default="10,100,1000", help="실행할 기사 수 (쉼표 구분)")
+    parser.add_argument("--stages", default=BENCHMARK_STAGES, help="실행할 파이프라인 단계 (쉼표 구분)")
+    parser.add_argument("--report-needed", action=argparse.BooleanOptionalAction, default=True,
+                        help="Gemini 스텁의 주간 보고서 응답에서 개선 필요 여부 (report 단계가 보고서를 저장할지)")
+    parser.add_argument("--feeds", type=int, default=4, help="RSS 피드 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gemini-latency", type=float, default=0.5, help="Gemini 호출당 지연(초)")
+    parser.add_argument("--gemini-latency-per-article", type=float, default=0.05, help="배치의 기사당 추가 지연(초)")
+    parser.add_argument("--gemini-rpm", type=float, default=600, help="스케줄러의 분당 요청 한도")
+    parser.add_argument("--notion-rps", type=float, default=3, help="NotionWriter의 초당 요청 한도")
+    parser.add_argument("--notion-limit-rps", type=float, default=None,
+                        help="메모리 Notion이 429를 돌려주기 시작하는 초당 요청 수 (기본값: 짧은 버스트를 허용하는 --notion-rps x 2)")
+    parser.add_argument("--notion-latency", type=float, default=0.05, help="Notion 호출당 지연(초)")
+    parser.add_argument("--rss-latency", type=float, default=0.05, help="RSS 응답 지연(초)")
+    parser.add_argument("--price-latency", type=float, default=0.2, help="가격 조회당 지연(초)")
+    parser.add_argument("--predictions-ratio", type=float, default=0.1,
+                        help="피드백 단계가 채점할 어제 예측 수 (기사 수 대비 비율)")
+    parser.add_argument("--output", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--log-dir", help="크기별 파이프라인 로그를 남길 디렉터리 (기본값: 버림)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    if args.notion_limit_rps is None:
+        args.notion_limit_rps = args.notion_rps * 2
+    return args
+
+
+def seed_predictions(notion, database_id, count, seed=0):
+    # 피드백 단계가 채점할 "어제" 예측 (저장 단계와 같은 속성 형식)
+    from benchmarks.fakes import load_company_names
+
+    rng = random.Random(seed)
+    tickers = [ticker for ticker, _ in load_company_names()]
+    created_time = datetime.now(timezone.utc) - timedelta(hours=20)
+    for i in range(count):
+        notion.add_page(database_id, {
+            "언급된 종목": {"rich_text": [{"text": {"content": ", ".join(rng.sample(tickers, rng.randint(1, 2)))}}]},
+            "감성분석": {"select": {"name": rng.choice(["Positive", "Negative"])}},
+            "AI 확신 점수": {"number": rng.randint(6, 9)},
+            "AI Pre-mortem": {"rich_text": [{"text": {"content": "1) 합성 위험 요인."}}]},
+            "URL": {"url": f"https://fixture.example.com/seed/{i}"},
+        }, created_time=created_time)
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def _call_latencies(snapshot):
+    # 같은 호출 이름이 다른 레이블(상태 등)로 나뉘어 있을 수 있으므로 이름별로 합치고,
+    # 백분위수는 히스토그램끼리 합칠 수 없으니 스팬 목록의 소요 시간으로 다시 계산
+    calls = {}
+    for histogram in snapshot["histograms"]:
+        if histogram["name"] == "call_seconds":
+            call = calls.setdefault(histogram["labels"]["name"], {"count": 0, "max": None})
+            call["count"] += histogram["count"]
+            if histogram["max"] is not None:
+                call["max"] = histogram["max"] if call["max"] is None else max(call["max"], histogram["max"])
+    durations = {}
+    for span in snapshot["spans"]:
+        if span["kind"] == "call":
+            durations.setdefault(span["name"], []).append(span["duration"])
+    for name, call in calls.items():
+        values = sorted(durations.get(name, []))
+        call["p50"] = _percentile(values, 50) if values else None
+        call["p95"] = _percentile(values, 95) if values else None
+    return calls
+
+
+def run_worker(args):
+    """한 가지 기사 수로 파이프라인을 실행하고 결과를 JSON 한 줄로 출력한다 (부모 프로세스가 환경 변수를 설정)."""
+    import advanced_market_analyzer as analyzer
+    from metrics import metrics
+    from price_store import SyntheticPriceSource
+    from benchmarks.fakes import generate_feed_articles, RSSFixtureServer, GeminiStub, InMemoryNotion
+
+    size = args.worker
+    feeds = generate_feed_articles(size, feeds=args.feeds, seed=args.seed)
+    notion = InMemoryNotion(DATABASE_IDS.values(), requests_per_second=args.notion_limit_rps, latency=args.notion_latency)
+    seed_predictions(notion, DATABASE_IDS["NOTION_DATABASE_ID"], max(1, int(size * args.predictions_ratio)), seed=args.seed)
+    log_path = os.path.join(args.log_dir, f"benchmark_{size}.log") if args.log_dir else os.devnull
+
+    with RSSFixtureServer(feeds, latency=args.rss_latency) as server, open(log_path, "w", encoding="utf-8") as log:
+        analyzer.RSS_FEEDS = server.feeds
+        with redirect_stdout(log):
+            analyzer.init_clients(
+                notion_client=notion,
+                model_factory=GeminiStub.factory(latency=args.gemini_latency,
+                                                 latency_per_article=args.gemini_latency_per_article, seed=args.seed,
+                                                 report_needed=args.report_needed),
+                price_source=SyntheticPriceSource(seed=args.seed, latency=args.price_latency),
+            )
+            start = time.perf_counter()
+            analyzer.main(["--stages", args.stages])
+            wall_seconds = time.perf_counter() - start
+
+    snapshot = metrics.snapshot()
+    saved = metrics.counter("articles_processed_total", stage="saved")
+    dropped = {}
+    for counter in snapshot["counters"]:
+        if counter["name"] == "articles_dropped_total":
+            reason = counter["labels"].get("reason")
+            dropped[reason] = dropped.get(reason, 0) + counter["value"]
+    print(json.dumps({
+        "articles": size,
+        "wall_seconds": round(wall_seconds, 3),
+        "articles_per_second": round(size / wall_seconds, 2) if wall_seconds else None,
+        "saved": saved,
+        "dropped": dropped,
+        "stages": snapshot["stage_durations"],
+        "steps": {
+            h["labels"]["name"]: h["sum"] for h in snapshot["histograms"] if h["name"] == "step_seconds"
+        },
+        "calls": _call_latencies(snapshot),
+        "api_calls": {service: metrics.counter("api_calls_total", service=service)
+                      for service in ("rss", "gemini", "notion", "prices")},
+        "notion_rate_limited": notion.stats["rate_limited"],
+        "gemini_tokens": {kind: metrics.counter("gemini_tokens_total", type=kind) for kind in ("input", "output")},
+    }, ensure_ascii=False))
+
+
+def run_size(args, size, argv):
+    with tempfile.TemporaryDirectory(prefix="market-bench-") as state_dir:
+        env = {
+            **os.environ,
+            **DATABASE_IDS,
+            "MARKET_STATE_DIR": state_dir,
+            "METRICS_PATH": os.path.join(state_dir, "run_metrics.json"),
+            "METRICS_PROMETHEUS_PATH": "",
+            "RSS_FEEDS_FILE": "",
+            # 피드의 모든 기사를 수집하고, 호출 한도는 벤치마크 설정을 따름
+            "RSS_MAX_ENTRIES_PER_FEED": "0",
+            "GEMINI_REQUESTS_PER_MINUTE": str(args.gemini_rpm),
+            "GEMINI_TOKENS_PER_MINUTE": str(10 ** 9),
+            "NOTION_REQUESTS_PER_SECOND": str(args.notion_rps),
+            "PYTHONIOENCODING": "utf-8",
+        }
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *argv, "--worker", str(size)],
+            env=env, capture_output=True, text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{size}개 기사 벤치마크 실패:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.3f}"
+
+
+def print_table(results):
+    print(f"{'기사 수':>8} {'전체(초)':>9} {'기사/초':>8} {'저장':>6}  단계별 소요 시간(초)")
+    for result in results:
+        stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in result["stages"].items())
+        print(f"{result['articles']:>8} {result['wall_seconds']:>9.2f} {result['articles_per_second']:>8.2f} {result['saved']:>6}  {stages}")
+    print("\n외부 호출 지연 (p50 / p95, 초):")
+    for result in results:
+        calls = ", ".join(f"{name} {_seconds(c['p50'])}/{_seconds(c['p95'])} (x{c['count']})" for name, c in sorted(result["calls"].items()))
+        print(f"  - {result['articles']}개: {calls} / Notion 429 {result['notion_rate_limited']}회")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args)
+        return
+    if args.log_dir:
+        os.makedirs(args.log_dir, exist_ok=True)
+
+    results = []
+    for size in args.sizes:
+        print(f"[벤치마크] 기사 {size}개 실행 중...", flush=True)
+        results.append(run_size(args, size, argv))
+    print()
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created_at": datetime.now().isoformat(), "settings": vars(args), "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
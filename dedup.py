@@ -0,0 +1,255 @@
+import os
+import re
+from collections import defaultdict, deque
+from functools import lru_cache
+
+import numpy as np
+
+from text_utils import canonical_url, strip_html
+
+# --- 피드 간 중복/동일 사건 기사 제거 (MinHash + LSH) ---
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16  # 16 밴드 x 4 행 → 자카드 유사도 약 0.5부터 후보로 잡힘
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.6"))
+DEDUP_MAX_SUMMARY_WORDS = 80
+# 상시 실행 모드에서 폴링 간 중복 비교를 위해 기억해 둘 최근 기사 수
+DEDUP_RECENT_MAX_ARTICLES = int(os.getenv("DEDUP_RECENT_MAX_ARTICLES", "5000"))
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)  # MinHash/밴드 해시 계수 (고정 시드)
+_PERM_A = (_rng.randint(0, 1 << 62, size=(DEDUP_NUM_PERM, 1), dtype=np.int64).astype(np.uint64) << np.uint64(1)) | np.uint64(1)
+_PERM_B = _rng.randint(0, 1 << 62, size=(DEDUP_NUM_PERM, 1), dtype=np.int64).astype(np.uint64)
+_SHINGLE_BASE = 1000003
+_BAND_COEFFS = _rng.randint(1, _MERSENNE_PRIME, size=DEDUP_NUM_PERM // DEDUP_BANDS).astype(np.uint64)
+_WORD_RE = re.compile(r"[a-z0-9$%.]+")
+
+
+def _word_hashes(article):
+    summary = strip_html(article.get('summary')).lower()
+    words = _WORD_RE.findall((article.get('title') or "").lower())
+    words += _WORD_RE.findall(summary)[:DEDUP_MAX_SUMMARY_WORDS]
+    # 시그니처는 한 실행 안에서만 비교하므로 프로세스 내에서 일관된 내장 hash()로 충분
+    return np.fromiter((hash(w) & 0xFFFFFFFF for w in words), dtype=np.int64, count=len(words))
+
+
+def _shingle_hashes(word_hashes, size=3):
+    # 연속된 단어 3개(shingle)의 해시를 단어 해시들로부터 벡터 연산으로 계산
+    if len(word_hashes) < size:
+        return word_hashes % _MERSENNE_PRIME
+    count = len(word_hashes) - size + 1
+    hashes = np.zeros(count, dtype=np.int64)
+    for k in range(size):
+        hashes = (hashes * _SHINGLE_BASE + word_hashes[k:k + count]) % _MERSENNE_PRIME
+    return hashes
+
+
+def minhash_signatures(articles, chunk_size=256):
+    """기사별 MinHash 시그니처 행렬(n x DEDUP_NUM_PERM)을 반환한다. 빈 기사는 빈 행 표시(-1)."""
+    signatures = np.full((len(articles), DEDUP_NUM_PERM), -1, dtype=np.int64)
+    for chunk_start in range(0, len(articles), chunk_size):
+        shingle_sets = [_shingle_hashes(_word_hashes(a)) for a in articles[chunk_start:chunk_start + chunk_size]]
+        non_empty = [i for i, hashes in enumerate(shingle_sets) if len(hashes)]
+        if not non_empty:
+            continue
+        all_hashes = np.concatenate([shingle_sets[i] for i in non_empty])
+        offsets = np.cumsum([0] + [len(shingle_sets[i]) for i in non_empty[:-1]])
+        # multiply-shift 해시 함수 64개를 청크 전체에 한 번에 적용하고 기사별 최솟값을 취함
+        permuted = ((_PERM_A * all_hashes.astype(np.uint64) + _PERM_B) >> np.uint64(33)).astype(np.int64)
+        signatures[[chunk_start + i for i in non_empty]] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def _band_keys(signatures):
+    # 시그니처를 DEDUP_BANDS개 밴드로 나눠 밴드별 키를 계산 (n x DEDUP_BANDS)
+    return (
+        signatures.reshape(len(signatures), DEDUP_BANDS, DEDUP_NUM_PERM // DEDUP_BANDS).astype(np.uint64) * _BAND_COEFFS
+    ).sum(axis=2)
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+@lru_cache(maxsize=None)
+def _upper_pairs(size):
+    # 크기 size인 버킷 안의 모든 (i < j) 위치 쌍 (버킷 크기는 몇 가지뿐이라 재사용)
+    return np.triu_indices(size, 1)
+
+
+def _candidate_pairs(band_keys, valid):
+    # 같은 밴드 키를 가진 기사 쌍 (i < j, 원래 인덱스)을 두 배열로 반환
+    pairs_i, pairs_j = [], []
+    for band in range(DEDUP_BANDS):
+        # 밴드 키로 정렬한 뒤 같은 키가 연속된 구간만 후보 버킷으로 취급
+        order = np.argsort(band_keys[:, band], kind="stable")
+        sorted_keys = band_keys[order, band]
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        starts = np.concatenate([[0], boundaries])
+        sizes = np.diff(np.concatenate([starts, [len(sorted_keys)]]))
+        for start, size in zip(starts[sizes > 1].tolist(), sizes[sizes > 1].tolist()):
+            members = valid[order[start:start + size]]
+            upper_i, upper_j = _upper_pairs(size)
+            pairs_i.append(members[upper_i])
+            pairs_j.append(members[upper_j])
+    if not pairs_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    first, second = np.concatenate(pairs_i), np.concatenate(pairs_j)
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    # 여러 밴드에서 겹친 쌍은 한 번만 확인
+    unique = np.unique(low * (int(valid.max()) + 1) + high)
+    return unique // (int(valid.max()) + 1), unique % (int(valid.max()) + 1)
+
+
+def find_duplicate_clusters(articles, threshold=DEDUP_SIMILARITY_THRESHOLD, entities=None):
+    """중복 기사들을 묶은 인덱스 클러스터 목록을 반환한다 (입력 순서 유지).
+
+    entities는 기사에서 회사/종목 집합을 꺼내는 함수다. 주면 본문이 비슷해도 언급한 종목이 서로 겹치지
+    않는 기사(같은 헤드라인 템플릿의 다른 회사 기사)는 묶지 않는다.
+    """
+    union_find = _UnionFind(len(articles))
+
+    # 1) 정규화된 URL이 같으면 같은 기사
+    seen_urls = {}
+    for i, article in enumerate(articles):
+        url_key = canonical_url(article.get('link'))
+        if url_key in seen_urls:
+            union_find.union(seen_urls[url_key], i)
+        elif url_key:
+            seen_urls[url_key] = i
+
+    # 2) LSH 밴드 버킷에서 후보 쌍을 찾고, 시그니처로 추정한 자카드 유사도로 한꺼번에 확인
+    signatures = minhash_signatures(articles)
+    valid = np.flatnonzero(signatures[:, 0] >= 0)
+    if len(valid):
+        pairs_i, pairs_j = _candidate_pairs(_band_keys(signatures[valid]), valid)
+        similar = (signatures[pairs_i] == signatures[pairs_j]).mean(axis=1) >= threshold
+        found = {}
+        for i, j in zip(pairs_i[similar].tolist(), pairs_j[similar].tolist()):
+            if entities is not None and _different_entities(articles, i, j, entities, found):
+                continue
+            union_find.union(i, j)
+
+    clusters = defaultdict(list)
+    for i in range(len(articles)):
+        clusters[union_find.find(i)].append(i)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def _different_entities(articles, i, j, entities, found):
+    # 두 기사 모두 종목을 언급하는데 하나도 겹치지 않으면 다른 사건 (found는 기사별 결과 캐시)
+    for k in (i, j):
+        if k not in found:
+            found[k] = set(entities(articles[k]))
+    return bool(found[i]) and bool(found[j]) and not (found[i] & found[j])
+
+
+def deduplicate_articles(articles, threshold=DEDUP_SIMILARITY_THRESHOLD, entities=None):
+    """클러스터마다 대표 기사(요약이 가장 긴 기사) 하나만 남기고 나머지 출처를 기록한다."""
+    representatives = []
+    for cluster in find_duplicate_clusters(articles, threshold, entities):
+        members = [articles[i] for i in cluster]
+        chosen = members[0] if len(members) == 1 else max(members, key=lambda a: len(strip_html(a.get('summary'))))
+        representative = dict(chosen)
+        representative['duplicate_sources'] = [
+            {'source': a.get('source'), 'title': a.get('title'), 'link': a.get('link')}
+            for a in members if a is not chosen
+        ]
+        representatives.append(representative)
+    return representatives
+
+
+class RecentArticleIndex:
+    """최근 처리한 기사의 정규화 URL과 MinHash 밴드 버킷을 기억해, 이후 폴링에 들어온 재배포 기사를 걸러낸다.
+
+    상시 실행 모드는 폴링마다 새로 들어온 기사만 받으므로 deduplicate_articles만으로는 이전 폴링의
+    기사와 비교할 수 없다. 오래된 기사부터 잊어 max_articles개까지만 보관한다.
+    entities는 find_duplicate_clusters와 같다.
+    """
+
+    def __init__(self, threshold=DEDUP_SIMILARITY_THRESHOLD, max_articles=DEDUP_RECENT_MAX_ARTICLES, entities=None):
+        self.threshold = threshold
+        self.max_articles = max_articles
+        self.entities = entities
+        self._entries = deque()  # (항목 번호, URL 목록, 시그니처, 밴드 키)
+        self._urls = defaultdict(int)
+        self._buckets = [defaultdict(set) for _ in range(DEDUP_BANDS)]
+        self._signatures = {}
+        self._entities = {}
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _is_similar(self, signature, band_keys, entities):
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates |= self._buckets[band].get(key, set())
+        return any(
+            np.mean(self._signatures[i] == signature) >= self.threshold
+            and not (entities and self._entities[i] and not (entities & self._entities[i]))
+            for i in candidates
+        )
+
+    def _add(self, urls, signature, band_keys, entities):
+        entry_id = self._next_id
+        self._next_id += 1
+        for url in urls:
+            self._urls[url] += 1
+        if band_keys is not None:
+            self._signatures[entry_id] = signature
+            self._entities[entry_id] = entities
+            for band, key in enumerate(band_keys):
+                self._buckets[band][key].add(entry_id)
+        self._entries.append((entry_id, urls, signature, band_keys))
+        while len(self._entries) > self.max_articles:
+            self._evict()
+
+    def _evict(self):
+        entry_id, urls, _, band_keys = self._entries.popleft()
+        for url in urls:
+            self._urls[url] -= 1
+            if not self._urls[url]:
+                del self._urls[url]
+        if band_keys is not None:
+            del self._signatures[entry_id]
+            del self._entities[entry_id]
+            for band, key in enumerate(band_keys):
+                bucket = self._buckets[band][key]
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def filter_new(self, articles):
+        """이미 본 기사와 겹치지 않는 기사만 입력 순서대로 반환하고, 반환한 기사를 색인에 추가한다."""
+        if not articles:
+            # 모든 피드가 304로 응답한 폴링 등 새 기사가 없는 경우
+            return []
+        signatures = minhash_signatures(articles)
+        band_keys = _band_keys(signatures).tolist()
+        fresh = []
+        for article, signature, keys in zip(articles, signatures, band_keys):
+            # 대표 기사에 묶인 재배포 출처의 URL도 함께 기억
+            urls = [canonical_url(a.get('link')) for a in [article, *article.get('duplicate_sources', [])]]
+            urls = [url for url in dict.fromkeys(urls) if url]
+            if any(url in self._urls for url in urls):
+                continue
+            entities = set(self.entities(article)) if self.entities is not None else set()
+            if signature[0] < 0:
+                keys = None
+            elif self._is_similar(signature, keys, entities):
+                continue
+            self._add(urls, signature, keys, entities)
+            fresh.append(article)
+        return fresh
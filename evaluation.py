@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- 예측 평가 엔진 설정 ---
+EVALUATION_HORIZONS = [int(h) for h in os.getenv("EVALUATION_HORIZONS", "1,3,5").split(",") if h.strip()]
+EVALUATION_BENCHMARK = os.getenv("EVALUATION_BENCHMARK", "SPY")
+MARKET_TIMEZONE = "America/New_York"
+MARKET_CLOSE = pd.Timedelta(hours=16)
+DIRECTION_SIGN = {"Positive": 1, "Negative": -1}
+
+
+def parse_tickers(tickers_text):
+    return [t.strip().upper() for t in (tickers_text or "").split(",") if t.strip()]
+
+
+def to_market_dates(timestamps):
+    # Notion created_time(UTC)을 미국 시장 기준 날짜로 변환
+    return pd.to_datetime(timestamps, utc=True).dt.tz_convert(MARKET_TIMEZONE).dt.tz_localize(None).dt.normalize()
+
+
+def to_entry_cutoffs(timestamps):
+    """기준가로 쓸 수 있는 마지막 종가의 날짜 상한. 장 마감 후 작성된 예측은 당일 종가까지,
+    장중/장 전에 작성된 예측은 전날 종가까지 (작성 시점에 아직 없던 당일 종가를 쓰지 않도록)."""
+    local = pd.to_datetime(timestamps, utc=True).dt.tz_convert(MARKET_TIMEZONE).dt.tz_localize(None)
+    dates = local.dt.normalize()
+    return dates.where(local - dates >= MARKET_CLOSE, dates - pd.Timedelta(days=1))
+
+
+def expand_predictions(predictions):
+    """예측 목록을 (예측, 종목) 단위의 행으로 펼친다. 방향성이 있는 예측만 평가 대상이다.
+
+    각 예측은 {"prediction_id", "tickers", "sentiment", "created_time", ...} 형태의 dict다.
+    """
+    rows = []
+    for prediction in predictions:
+        if prediction.get("sentiment") not in DIRECTION_SIGN:
+            continue
+        for ticker in prediction.get("tickers", []):
+            rows.append({**prediction, "ticker": ticker})
+    frame = pd.DataFrame(rows)
+    if not frame.empty:
+        frame["prediction_date"] = to_market_dates(frame["created_time"])
+        frame["entry_cutoff"] = to_entry_cutoffs(frame["created_time"])
+    return frame
+
+
+def _asof_prices(dates, prices, targets):
+    # 각 목표 날짜 당일 또는 그 이전의 마지막 종가 (목표가 NaT이거나 가격 기록이 그 날짜까지 없으면 NaN)
+    out = np.full(len(targets), np.nan)
+    known = ~np.isnat(targets)
+    if not len(dates):
+        return out
+    known &= targets <= dates[-1]
+    idx = np.searchsorted(dates, targets[known], side="right") - 1
+    positions = np.flatnonzero(known)
+    out[positions[idx >= 0]] = prices[idx[idx >= 0]]
+    return out
+
+
+def evaluate_predictions(predictions, closes, horizons=EVALUATION_HORIZONS, benchmark=EVALUATION_BENCHMARK):
+    """모든 (예측, 종목)을 여러 기간에 대해 종목별 벡터 연산으로 채점한다.
+
+    closes는 날짜 x 종목 종가 표(PriceStore.closes)다. 기준가는 예측 작성 시점 이전의 마지막
+    종가이며(미국 시장 기준, to_entry_cutoffs), h일 수익률은 그 종목 자체의 거래일로 h일 뒤 종가 기준이다. 종가가 없는 날을
+    앞의 값으로 채우지 않으므로, 거래 정지/휴장 차이로 청산일 종가가 없거나 아직 도래하지 않은
+    기간, 가격이 없는 종목은 NaN으로 남는다.
+    """
+    rows = expand_predictions(predictions)
+    if rows.empty:
+        return rows
+    matrix = closes.sort_index()
+    if matrix.empty:
+        return rows
+
+    size = len(rows)
+    cutoffs = rows["entry_cutoff"].to_numpy(dtype="datetime64[ns]")
+    entry_price = np.full(size, np.nan)
+    entry_date = np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]")
+    exit_price = {h: np.full(size, np.nan) for h in horizons}
+    exit_date = {h: np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]") for h in horizons}
+
+    for ticker, positions in rows.groupby("ticker").indices.items():
+        if ticker not in matrix:
+            continue
+        series = matrix[ticker].dropna()
+        dates = series.index.values.astype("datetime64[ns]")
+        prices = series.to_numpy(dtype=float)
+        entry_idx = np.searchsorted(dates, cutoffs[positions], side="right") - 1
+        has_entry = entry_idx >= 0
+        entry_price[positions[has_entry]] = prices[entry_idx[has_entry]]
+        entry_date[positions[has_entry]] = dates[entry_idx[has_entry]]
+        for h in horizons:
+            exit_idx = entry_idx + h
+            has_exit = has_entry & (exit_idx < len(dates))
+            exit_price[h][positions[has_exit]] = prices[exit_idx[has_exit]]
+            exit_date[h][positions[has_exit]] = dates[exit_idx[has_exit]]
+
+    signs = rows["sentiment"].map(DIRECTION_SIGN).to_numpy()
+    rows["entry_date"] = pd.to_datetime(entry_date)
+    rows["entry_price"] = entry_price
+
+    bench = None
+    if benchmark and benchmark in matrix:
+        bench_series = matrix[benchmark].dropna()
+        bench = (bench_series.index.values.astype("datetime64[ns]"), bench_series.to_numpy(dtype=float))
+        bench_entry = _asof_prices(*bench, entry_date)
+
+    for h in horizons:
+        ret = (exit_price[h] / entry_price - 1) * 100
+        rows[f"return_{h}d"] = ret
+        rows[f"correct_{h}d"] = np.where(np.isnan(ret), np.nan, (np.sign(ret) == signs).astype(float))
+        if bench is not None:
+            # 벤치마크는 같은 기간(종목의 기준일 ~ 청산일)의 종가로 비교
+            bench_ret = (_asof_prices(*bench, exit_date[h]) / bench_entry - 1) * 100
+            excess = ret - bench_ret
+            rows[f"excess_{h}d"] = excess
+            rows[f"beat_benchmark_{h}d"] = np.where(np.isnan(excess), np.nan, (np.sign(excess) == signs).astype(float))
+    return rows
+
+
+def summarize_accuracy(evaluated, horizons=EVALUATION_HORIZONS):
+    """기간별 채점 가능 건수/정확도를 요약한다."""
+    summary = {}
+    for h in horizons:
+        column = evaluated.get(f"correct_{h}d")
+        if column is None:
+            continue
+        scored = column.dropna()
+        summary[f"{h}d"] = {
+            "scored": int(len(scored)),
+            "accuracy": float(scored.mean() * 100) if len(scored) else None,
+        }
+    return summary
@@ -0,0 +1,87 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+from rate_limiter import RateLimiter, backoff_delay
+from text_utils import estimate_tokens
+
+# --- Gemini 호출 스케줄러 설정 (무료 티어: 분당 2회) ---
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "2"))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "250000"))
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", "4"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _status_code(error):
+    # google.api_core 예외는 .code에 HTTP 상태 코드를 담고 있음
+    for attr in ("code", "status_code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def usage_counts(response):
+    """응답의 usage_metadata에서 입력/출력/캐시 토큰 수를 꺼낸다 (없으면 0)."""
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "input": getattr(usage, "prompt_token_count", 0) or 0,
+        "output": getattr(usage, "candidates_token_count", 0) or 0,
+        "cached": getattr(usage, "cached_content_token_count", 0) or 0,
+        "total": getattr(usage, "total_token_count", 0) or 0,
+    }
+
+
+class GeminiScheduler:
+    """할당량(RPM/TPM)이 허용하는 만큼 Gemini 호출을 동시에 진행시키는 스케줄러.
+
+    고정된 time.sleep 대신 속도 제한기가 다음 호출 시점을 정하므로, 호출이 진행되는
+    동안 호출자는 응답 파싱이나 Notion/yfinance 작업을 계속할 수 있다.
+    """
+
+    def __init__(self, model, limiter=None, max_in_flight=GEMINI_MAX_IN_FLIGHT,
+                 max_retries=GEMINI_MAX_RETRIES):
+        self.model = model
+        self.limiter = limiter or RateLimiter(GEMINI_REQUESTS_PER_MINUTE, GEMINI_TOKENS_PER_MINUTE)
+        self.max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="gemini")
+
+    def submit(self, prompt, model=None):
+        return self._executor.submit(self.generate, prompt, model)
+
+    def generate(self, prompt, model=None):
+        """model을 주면 같은 할당량 아래에서 다른 설정(system instruction 등)의 모델로 호출한다."""
+        model = model or self.model
+        estimated_tokens = estimate_tokens(prompt)
+        for attempt in range(self.max_retries + 1):
+            metrics.observe("rate_limit_wait_seconds", self.limiter.acquire(estimated_tokens), service="gemini")
+            metrics.inc("api_calls_total", service="gemini")
+            try:
+                with metrics.span("gemini.generate", kind="call"):
+                    response = model.generate_content(prompt)
+            except Exception as e:
+                status = _status_code(e)
+                if status not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                metrics.inc("retries_total", service="gemini", status=status)
+                delay = backoff_delay(attempt)
+                print(f"    - Gemini 오류({status}), {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                if status == 429:
+                    # 할당량 초과는 모든 호출에 해당되므로 속도 제한기 전체를 멈추고 acquire에서 대기
+                    self.limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+
+            usage = usage_counts(response)
+            for key in ("input", "output", "cached"):
+                metrics.inc("gemini_tokens_total", usage[key], type=key)
+            if usage["total"]:
+                self.limiter.record_tokens(usage["total"] - estimated_tokens)
+            return response
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
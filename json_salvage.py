@@ -0,0 +1,81 @@
+import json
+
+_decoder = json.JSONDecoder()
+
+
+def strip_code_fences(text):
+    return (text or "").strip().replace("```json", "").replace("```", "").strip()
+
+
+def _find_object_end(text, start):
+    # 문자열 안의 괄호는 무시하며 start 위치의 '{'와 짝이 맞는 '}' 다음 위치를 찾음 (없으면 None)
+    depth = 0
+    in_string = False
+    escaped = False
+    for pos in range(start, len(text)):
+        ch = text[pos]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+    return None
+
+
+def salvage_json_objects(text):
+    """JSON 배열에서 올바른 형식의 객체를 모두 꺼낸다. 배열이 잘렸거나 일부가 깨져도 계속 진행한다.
+
+    (객체 목록, 통계)를 반환한다. 통계의 valid는 응답 전체가 올바른 JSON이었는지를 나타낸다.
+    """
+    text = strip_code_fences(text)
+    stats = {"parsed": 0, "malformed": 0, "truncated": False, "valid": False}
+    objects = []
+
+    # 정상적인 응답은 한 번에 처리
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = [data]
+        if isinstance(data, list):
+            objects = [item for item in data if isinstance(item, dict)]
+            stats["parsed"] = len(objects)
+            stats["malformed"] = len(data) - len(objects)
+            stats["valid"] = True
+            return objects, stats
+    except json.JSONDecodeError:
+        pass
+
+    pos = text.find("[")
+    pos = pos + 1 if pos != -1 else 0
+    while True:
+        pos = text.find("{", pos)
+        if pos == -1:
+            break
+        try:
+            obj, end = _decoder.raw_decode(text, pos)
+            objects.append(obj)
+            stats["parsed"] += 1
+            pos = end
+            continue
+        except json.JSONDecodeError:
+            pass
+
+        end = _find_object_end(text, pos)
+        if end is None:
+            # 응답이 중간에 잘림 - 이후에는 완전한 객체가 없음
+            stats["truncated"] = True
+            break
+        stats["malformed"] += 1
+        pos = end
+
+    return objects, stats
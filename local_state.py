@@ -0,0 +1,26 @@
+import os
+import json
+
+# 실행 간에 유지되어야 하는 로컬 상태(검증자, 캐시, 저널 등)를 저장하는 디렉터리
+STATE_DIR = os.getenv("MARKET_STATE_DIR", ".market_state")
+
+
+def state_path(filename):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, filename)
+
+
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def save_json(path, data):
+    # 중간에 종료되어도 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from local_state import state_path
+
+# --- 실행 지표(스팬/지연 히스토그램/카운터) ---
+METRICS_PATH = os.getenv("METRICS_PATH", os.path.join("metrics", "run_metrics.json"))
+# 설정하면 Prometheus 텍스트 형식으로도 기록 (예: metrics/run_metrics.prom)
+METRICS_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH")
+METRICS_HISTORY_PATH = os.getenv("METRICS_HISTORY_PATH") or state_path("metrics_history.jsonl")
+METRICS_MAX_SPANS = int(os.getenv("METRICS_MAX_SPANS", "5000"))
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+_PERCENTILE_WINDOW = 2000
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class Histogram:
+    """고정 구간 누적 히스토그램. 백분위수는 최근 관측값 창으로 계산한다."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._recent = deque(maxlen=_PERCENTILE_WINDOW)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self._recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def percentile(self, q):
+        if not self._recent:
+            return None
+        values = sorted(self._recent)
+        return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "min": None if self.min is None else round(self.min, 4),
+            "max": None if self.max is None else round(self.max, 4),
+            "p50": None if not self.count else round(self.percentile(50), 4),
+            "p95": None if not self.count else round(self.percentile(95), 4),
+            "buckets": {str(bound): n for bound, n in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+class Metrics:
+    """단계/외부 호출 스팬, 지연 히스토그램, 카운터를 모아 실행 요약(JSON/Prometheus)으로 기록한다.
+
+    카운터와 히스토그램은 이름 + 레이블 조합별로 집계된다. 예:
+    metrics.inc("retries_total", service="gemini", status=429)
+    with metrics.span("gemini.generate", kind="call"): ...
+    """
+
+    def __init__(self, max_spans=METRICS_MAX_SPANS):
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.max_spans = max_spans
+        self.counters = {}
+        self.histograms = {}
+        self.spans = []
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+
+    def inc(self, metric, amount=1, **labels):
+        key = (metric, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, metric, value, **labels):
+        key = (metric, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, metric, **labels):
+        """이름이 같은 카운터 중 주어진 레이블을 모두 가진 것들의 합계."""
+        wanted = set(_label_key(labels))
+        with self._lock:
+            return sum(v for (n, key), v in self.counters.items() if n == metric and wanted <= set(key))
+
+    @contextmanager
+    def span(self, name, kind="stage", attributes=None, **labels):
+        """구간 소요 시간을 {kind}_seconds 히스토그램과 스팬 목록에 기록한다. 예외는 오류로 세고 다시 던진다.
+
+        labels는 히스토그램과 스팬 모두에 붙고, attributes는 스팬에만 붙는다 (피드 이름처럼 값이 많아
+        히스토그램 시계열을 늘리면 안 되는 정보용).
+        """
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException as e:
+            status = "error"
+            self.inc("errors_total", name=name, kind=kind, error=type(e).__name__)
+            raise
+        finally:
+            self.record_span(name, start, time.perf_counter() - start, kind=kind, status=status,
+                             attributes=attributes, **labels)
+
+    def record_span(self, name, start, duration, kind="call", status="ok", attributes=None, **labels):
+        """이미 측정한 구간(start는 time.perf_counter() 값)을 기록한다."""
+        self.observe(f"{kind}_seconds", duration, name=name, **labels)
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append({
+                    "name": name,
+                    "kind": kind,
+                    "start": round(start - self._start, 4),
+                    "duration": round(duration, 4),
+                    "status": status,
+                    **{k: str(v) for k, v in {**(attributes or {}), **labels}.items() if v is not None},
+                })
+            else:
+                self.dropped_spans += 1
+
+    def stage_durations(self):
+        # 스팬 목록은 max_spans에서 잘리고 단계 스팬은 호출 스팬보다 늦게 기록되므로, 잘리지 않는 히스토그램에서 합산
+        with self._lock:
+            durations = {}
+            for (name, key), histogram in self.histograms.items():
+                if name == "stage_seconds":
+                    stage = dict(key)["name"]
+                    durations[stage] = durations.get(stage, 0.0) + histogram.sum
+            return {stage: round(seconds, 4) for stage, seconds in durations.items()}
+
+    def snapshot(self):
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(key), "value": value}
+                for (name, key), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {"name": name, "labels": dict(key), **histogram.to_dict()}
+                for (name, key), histogram in sorted(self.histograms.items())
+            ]
+            spans = list(self.spans)
+            dropped_spans = self.dropped_spans
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(time.perf_counter() - self._start, 4),
+            "commit": os.getenv("GITHUB_SHA"),
+            "stage_durations": self.stage_durations(),
+            "counters": counters,
+            "histograms": histograms,
+            "spans": spans,
+            "dropped_spans": dropped_spans,
+        }
+
+    def to_prometheus(self, prefix="market_analyzer"):
+        lines = []
+        with self._lock:
+            for (name, key), value in sorted(self.counters.items()):
+                labels = ",".join(f'{k}="{v}"' for k, v in key)
+                lines.append(f"{prefix}_{name}{{{labels}}} {value}" if labels else f"{prefix}_{name} {value}")
+            for (name, key), histogram in sorted(self.histograms.items()):
+                base = ",".join(f'{k}="{v}"' for k, v in key)
+                sep = "," if base else ""
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    lines.append(f'{prefix}_{name}_bucket{{{base}{sep}le="{bound}"}} {count}')
+                lines.append(f'{prefix}_{name}_bucket{{{base}{sep}le="+Inf"}} {histogram.count}')
+                suffix = f"{{{base}}}" if base else ""
+                lines.append(f"{prefix}_{name}_sum{suffix} {histogram.sum}")
+                lines.append(f"{prefix}_{name}_count{suffix} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=METRICS_PATH, prometheus_path=METRICS_PROMETHEUS_PATH, history_path=METRICS_HISTORY_PATH):
+        """실행 요약을 JSON(및 선택적으로 Prometheus 텍스트)으로 쓰고, 직전 실행 대비 단계별 소요 시간 변화를 반환한다."""
+        snapshot = self.snapshot()
+        for target in (path, prometheus_path):
+            if target and os.path.dirname(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        if prometheus_path:
+            with open(prometheus_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+
+        # 실행 간 비교를 위해 단계별 소요 시간만 로컬 이력에 누적
+        previous = None
+        if history_path:
+            try:
+                with open(history_path, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+                previous = json.loads(lines[-1]) if lines else None
+            except (FileNotFoundError, json.JSONDecodeError):
+                previous = None
+            with open(history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "started_at": snapshot["started_at"],
+                    "duration_seconds": snapshot["duration_seconds"],
+                    "stage_durations": snapshot["stage_durations"],
+                }, ensure_ascii=False) + "\n")
+
+        deltas = {}
+        if previous:
+            for stage, seconds in snapshot["stage_durations"].items():
+                before = previous.get("stage_durations", {}).get(stage)
+                if before is not None:
+                    deltas[stage] = round(seconds - before, 4)
+        return deltas
+
+
+# 프로세스 전체가 공유하는 지표 수집기
+metrics = Metrics()
@@ -0,0 +1,166 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from local_state import state_path
+
+# --- Notion 데이터베이스 로컬 미러 ---
+NOTION_MIRROR_PATH = os.getenv("NOTION_MIRROR_PATH") or state_path("notion_mirror.sqlite3")
+NOTION_MIRROR_INITIAL_DAYS = int(os.getenv("NOTION_MIRROR_INITIAL_DAYS", "90"))
+# 증분 조회는 삭제/보관된 페이지를 돌려주지 않으므로, 이 간격마다 미러 전체의 페이지 ID를 다시 확인
+NOTION_MIRROR_SWEEP_HOURS = float(os.getenv("NOTION_MIRROR_SWEEP_HOURS", "24"))
+
+
+def to_notion_timestamp(value):
+    # Notion 타임스탬프("2024-10-16T21:03:00.000Z")와 문자열 비교가 가능하도록 UTC ISO 형식으로 변환
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def iter_database_query(notion_writer, database_id, page_size=100, **query):
+    """has_more/next_cursor를 따라가며 조회 결과 페이지를 하나씩 돌려준다 (100개 제한 없음)."""
+    query = {"database_id": database_id, "page_size": page_size, **query}
+    while True:
+        response = notion_writer.call(notion_writer.client.databases.query, **query)
+        yield from response.get("results", [])
+        if not response.get("has_more") or not response.get("next_cursor"):
+            return
+        query["start_cursor"] = response["next_cursor"]
+
+
+class NotionMirror:
+    """분석/피드백/보고서 DB 페이지를 로컬 SQLite에 보관하고 last_edited_time 기준으로 증분 동기화한다."""
+
+    def __init__(self, notion_writer, path=NOTION_MIRROR_PATH, initial_days=NOTION_MIRROR_INITIAL_DAYS,
+                 sweep_hours=NOTION_MIRROR_SWEEP_HOURS):
+        self.notion_writer = notion_writer
+        self.initial_days = initial_days
+        self.sweep_hours = sweep_hours
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT PRIMARY KEY,
+                database_id TEXT NOT NULL,
+                created_time TEXT NOT NULL,
+                last_edited_time TEXT NOT NULL,
+                page_json TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_by_created ON pages (database_id, created_time);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                database_id TEXT PRIMARY KEY,
+                last_edited_cursor TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sweep_state (
+                database_id TEXT PRIMARY KEY,
+                swept_at TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def sync(self, database_id):
+        """마지막 동기화 이후 수정된 페이지만 받아온다. 받아온 페이지 수를 반환한다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_edited_cursor FROM sync_state WHERE database_id = ?", (database_id,)
+            ).fetchone()
+        if row:
+            # last_edited_time은 분 단위이므로 경계의 페이지는 다시 받아 덮어씀
+            query_filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": row[0]}}
+            cursor = row[0]
+        else:
+            since = to_notion_timestamp(datetime.now(timezone.utc) - timedelta(days=self.initial_days))
+            query_filter = {"timestamp": "created_time", "created_time": {"on_or_after": since}}
+            cursor = since
+
+        fetched = 0
+        batch = []
+        sorts = [{"timestamp": "last_edited_time", "direction": "ascending"}]
+        for page in iter_database_query(self.notion_writer, database_id, filter=query_filter, sorts=sorts):
+            batch.append(page)
+            cursor = max(cursor, page.get("last_edited_time", cursor))
+            if len(batch) >= 100:
+                fetched += self._upsert(database_id, batch)
+                batch = []
+        fetched += self._upsert(database_id, batch)
+
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (database_id, cursor))
+            self._conn.commit()
+        return fetched
+
+    def sweep(self, database_id, force=False):
+        """Notion에서 삭제/보관된 페이지를 미러에서 제거하고, 제거한 페이지 목록을 반환한다.
+
+        databases.query는 삭제/보관된 페이지를 돌려주지 않아 증분 동기화로는 삭제를 알 수 없으므로,
+        sweep_hours마다 미러에 있는 가장 오래된 페이지 이후의 페이지 ID를 모두 조회해 없는 페이지를 지운다.
+        조회가 중간에 실패하면 예외를 그대로 던지고 아무것도 지우지 않는다.
+        """
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT swept_at FROM sweep_state WHERE database_id = ?", (database_id,)
+            ).fetchone()
+            oldest = self._conn.execute(
+                "SELECT MIN(created_time) FROM pages WHERE database_id = ?", (database_id,)
+            ).fetchone()[0]
+        if row and not force and now - datetime.fromisoformat(row[0]) < timedelta(hours=self.sweep_hours):
+            return []
+
+        removed = []
+        if oldest:
+            query_filter = {"timestamp": "created_time", "created_time": {"on_or_after": oldest}}
+            live = {page["id"]: page for page in iter_database_query(self.notion_writer, database_id, filter=query_filter)}
+            self._upsert(database_id, list(live.values()))
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT page_id, page_json FROM pages WHERE database_id = ?", (database_id,)
+                ).fetchall()
+                removed = [json.loads(page_json) for page_id, page_json in rows if page_id not in live]
+                self._conn.executemany("DELETE FROM pages WHERE page_id = ?", [(page["id"],) for page in removed])
+                self._conn.commit()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sweep_state VALUES (?, ?)", (database_id, now.isoformat()))
+            self._conn.commit()
+        return removed
+
+    def _upsert(self, database_id, pages):
+        if not pages:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                [
+                    (page["id"], database_id, page.get("created_time", ""), page.get("last_edited_time", ""),
+                     json.dumps(page, ensure_ascii=False))
+                    for page in pages if not page.get("archived") and not page.get("in_trash")
+                ]
+            )
+            # 보관/삭제된 페이지는 미러에서도 제거
+            self._conn.executemany(
+                "DELETE FROM pages WHERE page_id = ?",
+                [(page["id"],) for page in pages if page.get("archived") or page.get("in_trash")]
+            )
+            self._conn.commit()
+        return len(pages)
+
+    def pages(self, database_id, created_since=None):
+        """미러에 저장된 페이지를 Notion 조회 결과와 같은 dict 형태로 생성 시각 순서대로 반환한다."""
+        query = "SELECT page_json FROM pages WHERE database_id = ?"
+        params = [database_id]
+        if created_since is not None:
+            query += " AND created_time >= ?"
+            params.append(to_notion_timestamp(created_since))
+        query += " ORDER BY created_time"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
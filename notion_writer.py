@@ -0,0 +1,199 @@
+import os
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from notion_client.errors import RequestTimeoutError
+
+from metrics import metrics
+from local_state import state_path
+from rate_limiter import RateLimiter, backoff_delay
+
+# --- Notion 쓰기 설정 (Notion API 평균 한도: 초당 3회) ---
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+NOTION_MAX_WORKERS = int(os.getenv("NOTION_MAX_WORKERS", "3"))
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))
+NOTION_WRITE_LEDGER_PATH = os.getenv("NOTION_WRITE_LEDGER_PATH") or state_path("notion_writes.sqlite3")
+
+RETRYABLE_STATUS_CODES = {409, 429, 500, 502, 503, 504}
+TRANSIENT_ERRORS = (RequestTimeoutError, httpx.TransportError)
+# 서버에서는 처리됐을 수도 있는 실패 (응답을 받지 못했거나 게이트웨이 오류)
+AMBIGUOUS_STATUS_CODES = {502, 504}
+
+
+def _method_name(method):
+    # 예: pages.create, databases.query
+    endpoint = type(getattr(method, "__self__", None)).__name__.replace("Endpoint", "").lower()
+    return f"notion.{endpoint}.{getattr(method, '__name__', 'call')}"
+
+
+def _is_ambiguous(error):
+    return isinstance(error, TRANSIENT_ERRORS) or getattr(error, "status", None) in AMBIGUOUS_STATUS_CODES
+
+
+def _retry_after_seconds(error):
+    headers = getattr(error, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class NotionWriter:
+    """Notion 호출을 공유 속도 제한기 아래에서 제한된 동시성으로 실행하는 쓰기 큐.
+
+    페이지마다 멱등 키(기사 URL, 예측 ID 등)를 붙이면, 로컬 기록(ledger)이나 사전 조회로
+    이미 존재하는 것으로 확인된 키는 다시 만들지 않는다.
+    """
+
+    def __init__(self, client, limiter=None, max_workers=NOTION_MAX_WORKERS,
+                 max_retries=NOTION_MAX_RETRIES, ledger_path=NOTION_WRITE_LEDGER_PATH):
+        self.client = client
+        self.limiter = limiter or RateLimiter(NOTION_REQUESTS_PER_SECOND, period=1.0)
+        self.max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="notion")
+        # 호출 스레드별 대기 작업 (여러 스레드가 같은 쓰기 큐를 써도 drain()이 서로의 결과를 가져가지 않도록)
+        self._pending = {}
+        self._known_keys = set()
+        self._lock = threading.Lock()
+        self._ledger = sqlite3.connect(ledger_path, check_same_thread=False)
+        self._ledger.execute("""
+            CREATE TABLE IF NOT EXISTS notion_writes (
+                key TEXT PRIMARY KEY,
+                database_id TEXT NOT NULL,
+                page_id TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._ledger.commit()
+        self._known_keys.update(row[0] for row in self._ledger.execute("SELECT key FROM notion_writes"))
+
+    def call(self, method, retry_ambiguous=True, **kwargs):
+        """Notion API 메서드를 속도 제한 + 재시도(Retry-After 준수)와 함께 호출한다.
+
+        retry_ambiguous=False면 서버에서 처리됐을 수도 있는 실패(시간 초과 등)는 재시도하지 않고 그대로 던진다.
+        """
+        name = _method_name(method)
+        for attempt in range(self.max_retries + 1):
+            metrics.observe("rate_limit_wait_seconds", self.limiter.acquire(), service="notion")
+            metrics.inc("api_calls_total", service="notion")
+            try:
+                with metrics.span(name, kind="call"):
+                    return method(**kwargs)
+            except Exception as e:
+                status = getattr(e, "status", None)
+                retryable = status in RETRYABLE_STATUS_CODES or isinstance(e, TRANSIENT_ERRORS)
+                if not retry_ambiguous and _is_ambiguous(e):
+                    retryable = False
+                if not retryable or attempt == self.max_retries:
+                    raise
+                metrics.inc("retries_total", service="notion", status=status or type(e).__name__)
+                retry_after = _retry_after_seconds(e)
+                if status == 429:
+                    # 속도 제한 응답은 모든 작업자에게 해당되므로 공유 제한기를 Retry-After만큼 멈춤
+                    self.limiter.pause(retry_after if retry_after is not None else backoff_delay(attempt, base=1.0))
+                else:
+                    time.sleep(retry_after if retry_after is not None else backoff_delay(attempt, base=1.0))
+
+    def register_keys(self, keys):
+        """대상 DB에 이미 존재하는 것으로 확인된 멱등 키를 등록한다 (예: 로컬 미러의 기사 URL)."""
+        with self._lock:
+            before = len(self._known_keys)
+            self._known_keys.update(k for k in keys if k)
+            return len(self._known_keys) - before
+
+    def forget_pages(self, page_ids, keys=()):
+        """Notion에서 삭제된 것으로 확인된 페이지의 멱등 키(쓰기 기록 포함)를 잊어 다시 저장할 수 있게 한다."""
+        page_ids = list(page_ids)
+        with self._lock:
+            forgotten = set(k for k in keys if k)
+            for page_id in page_ids:
+                forgotten.update(row[0] for row in self._ledger.execute(
+                    "SELECT key FROM notion_writes WHERE page_id = ?", (page_id,)
+                ))
+            self._ledger.executemany("DELETE FROM notion_writes WHERE page_id = ?", [(page_id,) for page_id in page_ids])
+            self._ledger.commit()
+            self._known_keys.difference_update(forgotten)
+            return len(forgotten)
+
+    def is_known(self, key):
+        """이미 저장된 것으로 확인된(또는 이번 실행에서 제출된) 멱등 키인지 여부."""
+        with self._lock:
+            return key in self._known_keys
+
+    def create_page(self, database_id, properties, children=None, key=None, label="", lookup=None, aliases=()):
+        """페이지 생성 작업을 큐에 넣는다. 결과는 drain()에서 한꺼번에 받는다.
+
+        aliases는 같은 페이지를 가리키는 다른 멱등 키다 (예: 중복 제거로 묶인 다른 출처의 URL).
+        key나 aliases 중 하나라도 이미 알려진 키면 건너뛰고, 저장하면 모두 쓰기 기록에 남긴다.
+
+        lookup은 같은 키의 페이지를 찾는 databases.query 필터다. 생성 요청이 시간 초과 등으로
+        서버 처리 여부를 알 수 없게 실패하면, 이 필터로 페이지가 이미 생겼는지 확인한 뒤에만 다시 만든다.
+        lookup이 없으면 다시 만들지 않고 실패로 처리한다 (다음 실행에서 미러의 키로 다시 확인).
+        """
+        with self._lock:
+            # 같은 실행 안에서 같은 키가 두 번 제출되는 경우도 막기 위해 제출 시점에 키를 선점
+            keys = [k for k in dict.fromkeys([key, *aliases]) if k] if key else []
+            if any(k in self._known_keys for k in keys):
+                self._pending.setdefault(threading.get_ident(), []).append(({"label": label, "key": key, "status": "skipped"}, None))
+                return
+            self._known_keys.update(keys)
+            future = self._executor.submit(self._create, database_id, properties, children, keys, lookup)
+            self._pending.setdefault(threading.get_ident(), []).append(({"label": label, "key": key, "keys": keys}, future))
+
+    def _create(self, database_id, properties, children, keys, lookup):
+        kwargs = {"parent": {"database_id": database_id}, "properties": properties}
+        if children:
+            kwargs["children"] = children
+        for attempt in range(self.max_retries + 1):
+            try:
+                page = self.call(self.client.pages.create, retry_ambiguous=False, **kwargs)
+                break
+            except Exception as e:
+                # 그대로 재시도하면 첫 요청이 서버에서 성공했을 때 중복 페이지가 생기므로 먼저 확인
+                if not _is_ambiguous(e) or lookup is None or attempt == self.max_retries:
+                    raise
+                metrics.inc("retries_total", service="notion", status=getattr(e, "status", None) or type(e).__name__)
+                time.sleep(backoff_delay(attempt, base=1.0))
+                existing = self.call(self.client.databases.query, database_id=database_id, filter=lookup, page_size=1)
+                if existing.get("results"):
+                    page = existing["results"][0]
+                    break
+        if keys:
+            page_id = page.get("id") if isinstance(page, dict) else None
+            with self._lock:
+                self._ledger.executemany(
+                    "INSERT OR REPLACE INTO notion_writes VALUES (?, ?, ?, ?)",
+                    [(k, database_id, page_id, time.time()) for k in keys]
+                )
+                self._ledger.commit()
+        return page
+
+    def drain(self):
+        """이 스레드가 큐에 넣은 모든 작업이 끝나기를 기다리고, 제출 순서대로 결과 목록을 반환한다."""
+        with self._lock:
+            pending = self._pending.pop(threading.get_ident(), [])
+        outcomes = []
+        for outcome, future in pending:
+            if future is not None:
+                keys = outcome.pop("keys")
+                try:
+                    future.result()
+                    outcome["status"] = "created"
+                except Exception as e:
+                    outcome["status"] = "failed"
+                    outcome["error"] = str(e)
+                    with self._lock:
+                        # 실패한 키는 다음 실행에서 다시 시도할 수 있도록 해제
+                        self._known_keys.difference_update(keys)
+            metrics.inc("notion_writes_total", status=outcome["status"])
+            outcomes.append(outcome)
+        return outcomes
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._ledger.close()
@@ -0,0 +1,197 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from metrics import metrics
+from local_state import state_path
+
+# --- 로컬 OHLC 가격 저장소 ---
+PRICE_STORE_PATH = os.getenv("PRICE_STORE_PATH") or state_path("prices.sqlite3")
+PRICE_LOOKBACK_DAYS = int(os.getenv("PRICE_LOOKBACK_DAYS", "30"))
+PRICE_REFRESH_MINUTES = float(os.getenv("PRICE_REFRESH_MINUTES", "60"))
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class YFinancePriceSource:
+    """여러 종목을 yf.download 한 번으로 받아오는 가격 소스."""
+
+    def fetch(self, tickers, start, end):
+        import yfinance as yf
+
+        data = yf.download(
+            tickers=list(tickers), start=start, end=end, group_by="ticker",
+            auto_adjust=False, threads=True, progress=False,
+        )
+        if data is None or data.empty:
+            return _empty_frame()
+
+        frames = []
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            frames.append(_normalize_frame(ticker, frame))
+        return pd.concat(frames, ignore_index=True) if frames else _empty_frame()
+
+
+class OfflinePriceSource:
+    """네트워크 없이 쓰는 가격 소스. {종목: DataFrame} 또는 종목별 CSV(<디렉터리>/<TICKER>.csv)를 읽는다."""
+
+    def __init__(self, frames=None, csv_dir=None):
+        self.frames = frames or {}
+        self.csv_dir = csv_dir
+
+    def fetch(self, tickers, start, end):
+        frames = []
+        for ticker in tickers:
+            frame = self.frames.get(ticker)
+            if frame is None and self.csv_dir:
+                path = os.path.join(self.csv_dir, f"{ticker}.csv")
+                if os.path.exists(path):
+                    frame = pd.read_csv(path, index_col=0, parse_dates=True)
+            if frame is None:
+                continue
+            frame = frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+            frames.append(_normalize_frame(ticker, frame))
+        return pd.concat(frames, ignore_index=True) if frames else _empty_frame()
+
+
+class SyntheticPriceSource:
+    """네트워크 없이 쓰는 합성 가격 소스 (벤치마크용). 종목마다 고정 시드의 무작위 보행 일봉을 만든다.
+
+    피드백 검증이 요일과 무관하게 다음 거래일을 찾을 수 있도록 주말을 포함한 매일의 일봉을 만든다.
+    """
+
+    ORIGIN = pd.Timestamp("2020-01-01")
+
+    def __init__(self, seed=0, latency=0.0):
+        self.seed = seed
+        self.latency = latency
+
+    def fetch(self, tickers, start, end):
+        time.sleep(self.latency)
+        dates = pd.date_range(self.ORIGIN, pd.Timestamp(end) - pd.Timedelta(days=1), freq="D")
+        frames = []
+        for ticker in tickers:
+            # 같은 종목은 조회 구간과 무관하게 항상 같은 가격이 나오도록 기준일부터 보행을 생성
+            rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode())])
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(dates))))
+            frame = pd.DataFrame({
+                "open": close * (1 + rng.normal(0, 0.003, len(dates))),
+                "high": close * 1.01,
+                "low": close * 0.99,
+                "close": close,
+                "volume": rng.integers(1_000_000, 5_000_000, len(dates)).astype(float),
+            }, index=dates)
+            frames.append(_normalize_frame(ticker, frame[frame.index >= pd.Timestamp(start)]))
+        return pd.concat(frames, ignore_index=True) if frames else _empty_frame()
+
+
+def _empty_frame():
+    return pd.DataFrame(columns=["ticker", "date"] + PRICE_COLUMNS)
+
+
+def _normalize_frame(ticker, frame):
+    frame = frame.rename(columns=lambda c: str(c).lower()).dropna(subset=["close"])
+    return pd.DataFrame({
+        "ticker": ticker,
+        "date": pd.to_datetime(frame.index).strftime("%Y-%m-%d"),
+        **{col: frame[col].astype(float).values if col in frame else None for col in PRICE_COLUMNS},
+    })
+
+
+class PriceStore:
+    """종목별 일봉을 SQLite에 저장하고, 부족한 구간만 가격 소스에서 일괄로 받아 채운다."""
+
+    def __init__(self, path=PRICE_STORE_PATH, source=None, refresh_minutes=PRICE_REFRESH_MINUTES):
+        self.source = source or YFinancePriceSource()
+        self.refresh_seconds = refresh_minutes * 60
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS ohlc (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, date)
+            );
+            CREATE TABLE IF NOT EXISTS fetch_log (
+                ticker TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def update(self, tickers, lookback_days=PRICE_LOOKBACK_DAYS):
+        """최근에 갱신되지 않은 종목만 골라, 시작일이 같은 종목끼리 한 번에 받아온다. 받아온 행 수를 반환한다.
+
+        저장된 구간이 lookback_days를 덮지 못하면(백필 등) 요청 시작일부터 다시 받는다.
+        """
+        tickers = sorted({t.strip().upper() for t in tickers if t and t.strip()})
+        now = time.time()
+        today = datetime.now().date()
+        groups = {}
+        with self._lock:
+            for ticker in tickers:
+                first, last = self._conn.execute(
+                    "SELECT MIN(date), MAX(date) FROM ohlc WHERE ticker = ?", (ticker,)
+                ).fetchone()
+                requested_start = today - timedelta(days=lookback_days)
+                covered = last and datetime.strptime(first, "%Y-%m-%d").date() <= requested_start + timedelta(days=5)
+                if not covered:
+                    start = requested_start
+                else:
+                    fetched = self._conn.execute("SELECT fetched_at FROM fetch_log WHERE ticker = ?", (ticker,)).fetchone()
+                    if fetched and now - fetched[0] < self.refresh_seconds:
+                        continue
+                    # 수정 주가/장중 데이터 반영을 위해 마지막 저장일 며칠 전부터 다시 받음
+                    start = datetime.strptime(last, "%Y-%m-%d").date() - timedelta(days=3)
+                groups.setdefault(start, []).append(ticker)
+
+        fetched_rows = 0
+        for start, group in groups.items():
+            metrics.inc("api_calls_total", service="prices")
+            with metrics.span("prices.fetch", kind="call", source=type(self.source).__name__):
+                frame = self.source.fetch(group, start.isoformat(), (today + timedelta(days=1)).isoformat())
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO ohlc VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    frame[["ticker", "date"] + PRICE_COLUMNS].itertuples(index=False, name=None)
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO fetch_log VALUES (?, ?)", [(t, now) for t in group]
+                )
+                self._conn.commit()
+            fetched_rows += len(frame)
+        return fetched_rows
+
+    def closes(self, tickers, start=None):
+        """날짜 x 종목 형태의 종가 표를 반환한다."""
+        tickers = sorted({t.strip().upper() for t in tickers if t and t.strip()})
+        if not tickers:
+            return pd.DataFrame()
+        query = f"SELECT ticker, date, close FROM ohlc WHERE ticker IN ({','.join('?' * len(tickers))})"
+        params = list(tickers)
+        if start:
+            query += " AND date >= ?"
+            params.append(str(start))
+        with self._lock:
+            frame = pd.read_sql_query(query, self._conn, params=params)
+        if frame.empty:
+            return pd.DataFrame(columns=tickers)
+        table = frame.pivot(index="date", columns="ticker", values="close").sort_index()
+        table.index = pd.to_datetime(table.index)
+        return table
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,77 @@
+import os
+import re
+
+from text_utils import strip_html, estimate_tokens
+
+# --- 토큰 예산 기반 배치 구성 설정 ---
+ANALYSIS_INPUT_TOKEN_BUDGET = int(os.getenv("ANALYSIS_INPUT_TOKEN_BUDGET", "12000"))
+ANALYSIS_OUTPUT_TOKEN_BUDGET = int(os.getenv("ANALYSIS_OUTPUT_TOKEN_BUDGET", "6000"))
+ANALYSIS_OUTPUT_TOKENS_PER_ARTICLE = int(os.getenv("ANALYSIS_OUTPUT_TOKENS_PER_ARTICLE", "450"))
+ANALYSIS_MAX_ARTICLES_PER_BATCH = int(os.getenv("ANALYSIS_MAX_ARTICLES_PER_BATCH", "12"))
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "1500"))
+
+# RSS 요약 끝에 붙는 상투적인 문구 (분석에 쓸모없는 토큰)
+_BOILERPLATE_PATTERNS = [
+    re.compile(r"The post .{0,300}? appeared first on .{0,200}?\.?$", re.IGNORECASE),
+    re.compile(r"\b(Continue reading|Read more|Read the full (story|article)|Click here)\b.*$", re.IGNORECASE),
+    re.compile(r"\[(…|\.\.\.)\]\s*$"),
+    re.compile(r"^\s*(Reuters|Bloomberg|\(?AP\)?)\s*[-–—]\s*", re.IGNORECASE),
+]
+
+
+def clean_summary(summary, max_chars=SUMMARY_MAX_CHARS):
+    text = strip_html(summary)
+    for pattern in _BOILERPLATE_PATTERNS:
+        text = pattern.sub("", text).strip()
+    if len(text) > max_chars:
+        # 문장 중간에서 자르지 않도록 마지막 마침표까지 유지
+        cut = text[:max_chars]
+        text = cut[:cut.rfind(". ") + 1] if ". " in cut else cut
+    return text
+
+
+def format_article(index, article):
+    title = strip_html(article.get('title'))
+    # 로컬 종목 색인이 찾은 후보 티커를 힌트로 전달
+    hints = article.get('candidate_tickers')
+    hint_tag = f"<candidate_tickers>{', '.join(hints)}</candidate_tickers>" if hints else ""
+    return f"<article index=\"{index}\"><title>{title}</title>{hint_tag}<content>{clean_summary(article.get('summary'))}</content></article>"
+
+
+def article_tokens(article):
+    return estimate_tokens(format_article(0, article))
+
+
+def pack_batches(articles, prompt_overhead_tokens=0,
+                 input_token_budget=ANALYSIS_INPUT_TOKEN_BUDGET,
+                 output_token_budget=ANALYSIS_OUTPUT_TOKEN_BUDGET,
+                 output_tokens_per_article=ANALYSIS_OUTPUT_TOKENS_PER_ARTICLE,
+                 max_articles_per_batch=ANALYSIS_MAX_ARTICLES_PER_BATCH):
+    """기사들을 입력/출력 토큰 예산 안에서 가능한 한 적은 배치로 묶는다 (First-Fit Decreasing).
+
+    반환값은 {"articles": [...], "input_tokens": int, "output_tokens": int} 목록이다.
+    """
+    article_budget = max(1, input_token_budget - prompt_overhead_tokens)
+    max_per_batch = max(1, min(max_articles_per_batch, output_token_budget // max(1, output_tokens_per_article)))
+
+    sized = sorted(((article_tokens(a), a) for a in articles), key=lambda item: -item[0])
+    batches = []
+    for tokens, article in sized:
+        for batch in batches:
+            if batch["article_tokens"] + tokens <= article_budget and len(batch["articles"]) < max_per_batch:
+                break
+        else:
+            # 예산보다 큰 기사도 단독 배치로는 보냄
+            batch = {"articles": [], "article_tokens": 0}
+            batches.append(batch)
+        batch["articles"].append(article)
+        batch["article_tokens"] += tokens
+
+    return [
+        {
+            "articles": batch["articles"],
+            "input_tokens": batch["article_tokens"] + prompt_overhead_tokens,
+            "output_tokens": len(batch["articles"]) * output_tokens_per_article,
+        }
+        for batch in batches
+    ]
@@ -0,0 +1,73 @@
+import time
+import random
+import threading
+
+
+class TokenBucket:
+    """capacity만큼 쌓였다가 period 동안 capacity개가 다시 채워지는 토큰 버킷."""
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.refill_rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        # 한 번에 capacity보다 큰 요청은 버킷이 가득 찼을 때 통과시킴 (영원히 대기하지 않도록)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """요청 수/토큰 수 한도를 함께 지키는 스레드 안전 속도 제한기.
+
+    429 응답을 받으면 pause()로 모든 호출자를 함께 멈춰 할당량 전체가 회복되기를 기다린다.
+    """
+
+    def __init__(self, max_requests, max_tokens=None, period=60.0):
+        self.request_bucket = TokenBucket(max_requests, period)
+        self.token_bucket = TokenBucket(max_tokens, period) if max_tokens else None
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self.paused_until - now, self.request_bucket.wait_time(1, now))
+                if self.token_bucket and tokens:
+                    wait = max(wait, self.token_bucket.wait_time(tokens, now))
+                if wait <= 0:
+                    self.request_bucket.consume(1)
+                    if self.token_bucket and tokens:
+                        self.token_bucket.consume(tokens)
+                    return now - start
+            time.sleep(min(wait, 1.0))
+
+    def record_tokens(self, extra_tokens):
+        # 실제 사용 토큰이 추정치와 다를 때 차이만큼 버킷을 보정
+        if not self.token_bucket or not extra_tokens:
+            return
+        with self._lock:
+            self.token_bucket._refill(time.monotonic())
+            self.token_bucket.tokens = min(self.token_bucket.capacity, self.token_bucket.tokens - extra_tokens)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def backoff_delay(attempt, base=2.0, cap=60.0):
+    # 지수 백오프 + full jitter
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
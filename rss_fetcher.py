@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import feedparser
+import requests
+
+from metrics import metrics
+from local_state import state_path, load_json, save_json
+
+# --- RSS 동시 수집 설정 ---
+RSS_MAX_WORKERS = int(os.getenv("RSS_MAX_WORKERS", "16"))
+RSS_TIMEOUT_SECONDS = float(os.getenv("RSS_TIMEOUT_SECONDS", "10"))
+RSS_MAX_BYTES = int(os.getenv("RSS_MAX_BYTES", str(5 * 1024 * 1024)))
+RSS_VALIDATOR_PATH = os.getenv("RSS_VALIDATOR_PATH") or state_path("rss_validators.json")
+USER_AGENT = "Automatic-FinanceNews/1.0 (+feedparser)"
+
+_thread_local = threading.local()
+
+
+def _get_session():
+    # requests.Session은 스레드 간 공유가 안전하지 않으므로 워커 스레드마다 하나씩 사용
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        _thread_local.session = session
+    return session
+
+
+def load_feeds(default_feeds):
+    # RSS_FEEDS_FILE(JSON: {"이름": "URL"})이 지정되면 수백 개의 피드를 파일에서 읽어옴
+    feeds_file = os.getenv("RSS_FEEDS_FILE")
+    if not feeds_file:
+        return dict(default_feeds)
+    feeds = load_json(feeds_file, None)
+    if not isinstance(feeds, dict) or not feeds:
+        raise ValueError(f"RSS 피드 파일을 읽을 수 없습니다: {feeds_file}")
+    return feeds
+
+
+def fetch_feed(name, url, validator=None, timeout=RSS_TIMEOUT_SECONDS, max_bytes=RSS_MAX_BYTES):
+    """피드 하나를 조건부 GET으로 받아 파싱하고, 지연 시간/바이트 수를 함께 반환한다."""
+    validator = validator or {}
+    headers = {}
+    if validator.get("etag"):
+        headers["If-None-Match"] = validator["etag"]
+    if validator.get("last_modified"):
+        headers["If-Modified-Since"] = validator["last_modified"]
+
+    result = {
+        "name": name,
+        "url": url,
+        "status": None,
+        "entries": [],
+        "bytes": 0,
+        "latency": 0.0,
+        "validator": validator,
+        "error": None,
+    }
+    start = time.perf_counter()
+    deadline = start + timeout
+    try:
+        session = _get_session()
+        with session.get(url, headers=headers, timeout=(timeout, timeout), stream=True) as response:
+            result["status"] = response.status_code
+            if response.status_code == 304:
+                # 변경되지 않은 피드는 본문을 받지도, 파싱하지도 않음
+                return result
+            response.raise_for_status()
+
+            # 읽기 타임아웃은 청크 단위이므로 전체 수신 시간에 대한 마감 시간을 별도로 확인
+            chunks = []
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                result["bytes"] += len(chunk)
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"{timeout:.0f}초 제한 초과")
+                if result["bytes"] > max_bytes:
+                    raise ValueError(f"피드 크기 제한 초과 ({result['bytes']} bytes)")
+
+            feed = feedparser.parse(b"".join(chunks))
+            result["entries"] = feed.entries
+            result["validator"] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        result["latency"] = time.perf_counter() - start
+        # 피드 이름은 스팬에만 남기고 히스토그램/카운터는 피드 수와 무관하게 하나로 집계
+        metrics.record_span("rss.fetch", start, result["latency"], status="error" if result["error"] else "ok",
+                            attributes={"feed": name})
+        metrics.inc("api_calls_total", service="rss", status=result["status"] or "error")
+        metrics.inc("rss_bytes_total", result["bytes"])
+        if result["error"]:
+            metrics.inc("errors_total", name="rss.fetch", kind="call")
+    return result
+
+
+def fetch_feeds_concurrently(feeds, max_workers=RSS_MAX_WORKERS, timeout=RSS_TIMEOUT_SECONDS,
+                             validator_path=RSS_VALIDATOR_PATH):
+    """여러 피드를 제한된 워커 풀로 동시에 수집한다. 전체 소요 시간은 가장 느린 피드에 좌우된다."""
+    validators = load_json(validator_path, {})
+    results = []
+    if not feeds:
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(feeds))) as executor:
+        futures = [
+            executor.submit(fetch_feed, name, url, validators.get(url), timeout)
+            for name, url in feeds.items()
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            # 성공적으로 파싱된 피드의 검증자만 저장 (실패 시 다음 실행에서 전체를 다시 받음)
+            if result["error"] is None and result["status"] != 304:
+                validators[result["url"]] = result["validator"]
+
+    save_json(validator_path, validators)
+    return results
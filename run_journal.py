@@ -0,0 +1,124 @@
+import os
+import threading
+from datetime import datetime
+
+from local_state import state_path, load_json, save_json
+
+# --- 파이프라인 실행 저널 ---
+RUN_JOURNAL_PATH = os.getenv("RUN_JOURNAL_PATH") or state_path("run_journal.json")
+PIPELINE_STAGES = ["fetch", "analyze", "save", "feedback", "report"]
+
+
+class RunJournal:
+    """파이프라인 단계별 진행 상황과 중간 산출물(수집 기사, 분석 결과)을 로컬에 기록한다.
+
+    resume=True면 직전 실행의 기록을 이어받아 완료된 단계를 건너뛸 수 있다. 새 실행이라도
+    직전 산출물은 유지되므로, 수집 없이 분석만 하거나 분석 없이 저장만 하는 단계별 실행이
+    가능하다. 배치별 분석 결과는 분석 캐시에, 성공한 Notion 쓰기는 쓰기 기록(ledger)에
+    남으므로 다시 실행해도 끝난 작업에는 비용이 들지 않는다.
+    """
+
+    def __init__(self, path=RUN_JOURNAL_PATH, resume=False):
+        self.path = path
+        self._lock = threading.Lock()
+        previous = load_json(path, {})
+        self.resumed = bool(resume and previous.get("run_id"))
+        if self.resumed:
+            self.data = previous
+        else:
+            self.data = {
+                "run_id": datetime.now().strftime("%Y%m%d-%H%M%S"),
+                "stages": {},
+                "articles": previous.get("articles"),
+                "results": previous.get("results"),
+            }
+        self._save()
+
+    @property
+    def run_id(self):
+        return self.data["run_id"]
+
+    def _save(self):
+        save_json(self.path, self.data)
+
+    def is_done(self, stage):
+        return self.data["stages"].get(stage, {}).get("status") == "done"
+
+    def summary(self, stage):
+        return self.data["stages"].get(stage, {}).get("summary")
+
+    def start(self, stage):
+        with self._lock:
+            entry = self.data["stages"].setdefault(stage, {"attempts": 0})
+            entry.update(status="running", started_at=datetime.now().isoformat(), error=None)
+            entry["attempts"] += 1
+            self._save()
+
+    def finish(self, stage, summary=None):
+        with self._lock:
+            entry = self.data["stages"].setdefault(stage, {"attempts": 0})
+            entry.update(status="done", finished_at=datetime.now().isoformat(), summary=summary)
+            self._save()
+
+    def fail(self, stage, error, summary=None):
+        with self._lock:
+            entry = self.data["stages"].setdefault(stage, {"attempts": 0})
+            entry.update(status="failed", finished_at=datetime.now().isoformat(), error=str(error), summary=summary)
+            self._save()
+
+    def reset(self, stage):
+        """단계를 다시 실행해야 하는 상태로 되돌린다 (입력이 바뀐 뒤 --resume에서 건너뛰지 않도록)."""
+        with self._lock:
+            entry = self.data["stages"].get(stage)
+            if entry and entry.get("status") == "done":
+                entry["status"] = "pending"
+                self._save()
+
+    def save_articles(self, articles):
+        # 새로 수집한 기사 목록이 생기면 이전 분석 결과(기사 위치 참조)는 더 이상 맞지 않으므로 비움
+        with self._lock:
+            self.data["articles"] = articles
+            self.data["results"] = None
+            self._save()
+
+    def load_articles(self):
+        return self.data.get("articles")
+
+    def save_results(self, results):
+        # original_article는 저장된 기사 목록의 위치로 바꿔 기록 (목록에 없는 기사는 그대로 포함)
+        with self._lock:
+            position = {id(article): i for i, article in enumerate(self.data.get("articles") or [])}
+            records = []
+            for result in results:
+                record = {k: v for k, v in result.items() if k != "original_article"}
+                article = result.get("original_article")
+                if id(article) in position:
+                    record["article_ref"] = position[id(article)]
+                else:
+                    record["article"] = article
+                records.append(record)
+            self.data["results"] = records
+            self._save()
+
+    def load_results(self):
+        records = self.data.get("results")
+        if records is None:
+            return None
+        articles = self.data.get("articles") or []
+        results = []
+        for record in records:
+            result = {k: v for k, v in record.items() if k not in ("article_ref", "article")}
+            if "article_ref" in record:
+                result["original_article"] = articles[record["article_ref"]]
+            else:
+                result["original_article"] = record.get("article")
+            results.append(result)
+        return results
+
+    def describe(self):
+        parts = []
+        for stage in PIPELINE_STAGES:
+            entry = self.data["stages"].get(stage)
+            if entry:
+                parts.append(f"{stage}={entry['status']}")
+        return ", ".join(parts) or "실행된 단계 없음"
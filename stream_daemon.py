@@ -0,0 +1,189 @@
+import os
+import time
+import queue
+import signal
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from local_state import state_path, load_json, save_json
+
+# --- 상시 실행(스트리밍) 모드 설정 ---
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "120"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "200"))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "12"))
+STREAM_MAX_WAIT_SECONDS = float(os.getenv("STREAM_MAX_WAIT_SECONDS", "60"))
+# 일일 피드백/주간 보고서 예약 시각 (기존 cron과 같은 21:00 UTC)
+STREAM_JOBS_AT_UTC = os.getenv("STREAM_JOBS_AT_UTC", "21:00")
+STREAM_SEEN_MAX = int(os.getenv("STREAM_SEEN_MAX", "20000"))
+STREAM_SCHEDULE_PATH = os.getenv("STREAM_SCHEDULE_PATH") or state_path("stream_schedule.json")
+
+
+def _log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+class DailyJob:
+    """매일 지정한 UTC 시각 이후 한 번 실행되는 작업 (weekdays: 0=월요일)."""
+
+    def __init__(self, name, func, at_utc="21:00", weekdays=range(7)):
+        self.name = name
+        self.func = func
+        self.at = tuple(int(part) for part in at_utc.split(":"))
+        self.weekdays = set(weekdays)
+
+    def is_due(self, now, last_run_date):
+        return (
+            now.weekday() in self.weekdays
+            and (now.hour, now.minute) >= self.at
+            and last_run_date != now.date().isoformat()
+        )
+
+
+class StreamingDaemon:
+    """피드를 주기적으로 폴링해 새 기사를 제한된 큐에 넣고, 배치가 차거나 최대 대기 시간이 지나면
+    바로 처리하는 상시 실행 루프.
+
+    큐가 가득 차면 폴링 스레드가 빈자리가 날 때까지 기다리므로(역압) 처리 속도보다 빨리 기사를
+    쌓지 않는다. SIGINT/SIGTERM을 받으면 폴링을 멈추고 큐에 남은 기사를 처리한 뒤 종료한다.
+    예약 작업(일일 피드백, 주간 보고서)은 별도 스레드에서 같은 프로세스 안에 실행된다.
+    """
+
+    def __init__(self, poll, process_batch, key, jobs=(), poll_seconds=STREAM_POLL_SECONDS,
+                 queue_size=STREAM_QUEUE_SIZE, batch_size=STREAM_BATCH_SIZE,
+                 max_wait_seconds=STREAM_MAX_WAIT_SECONDS, seen_max=STREAM_SEEN_MAX,
+                 schedule_path=STREAM_SCHEDULE_PATH):
+        self.poll = poll
+        self.process_batch = process_batch
+        self.key = key
+        self.jobs = list(jobs)
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.seen_max = seen_max
+        self.schedule_path = schedule_path
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.stats = {"polls": 0, "enqueued": 0, "duplicates": 0, "batches": 0, "processed": 0, "errors": 0}
+        self._seen = OrderedDict()
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _is_new(self, article):
+        # 이미 큐에 넣은 기사(같은 키)는 다시 넣지 않음. 오래된 키부터 잊어 메모리를 제한
+        key = self.key(article)
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            return False
+        self._seen[key] = True
+        if len(self._seen) > self.seen_max:
+            self._seen.popitem(last=False)
+        return True
+
+    def _poll_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                articles = self.poll()
+                self._count("polls")
+            except Exception as e:
+                self._count("errors")
+                _log(f"✗ 피드 폴링 실패: {e}")
+                articles = []
+            fresh = [article for article in articles if self._is_new(article)]
+            self._count("duplicates", len(articles) - len(fresh))
+            for article in fresh:
+                # 큐가 가득 차면 소비자가 따라잡을 때까지 대기 (종료 요청은 계속 확인)
+                while not self.stop_event.is_set():
+                    try:
+                        self.queue.put((time.monotonic(), article), timeout=1.0)
+                        self._count("enqueued")
+                        break
+                    except queue.Full:
+                        continue
+            if fresh:
+                _log(f"새 기사 {len(fresh)}개 큐에 추가 (대기 {self.queue.qsize()}개)")
+            self.stop_event.wait(self.poll_seconds)
+
+    def _flush(self, batch):
+        oldest_wait = time.monotonic() - batch[0][0]
+        articles = [article for _, article in batch]
+        _log(f"배치 처리: {len(articles)}개 기사 (가장 오래 대기 {oldest_wait:.0f}초)")
+        try:
+            self.process_batch(articles)
+            self._count("processed", len(articles))
+        except Exception as e:
+            self._count("errors")
+            _log(f"✗ 배치 처리 실패: {e}")
+        self._count("batches")
+
+    def _consume_loop(self):
+        batch = []
+        deadline = None
+        while True:
+            stopping = self.stop_event.is_set()
+            timeout = 1.0 if deadline is None else max(0.0, min(1.0, deadline - time.monotonic()))
+            try:
+                item = self.queue.get(timeout=timeout) if not stopping else self.queue.get_nowait()
+                batch.append(item)
+                if deadline is None:
+                    deadline = item[0] + self.max_wait_seconds
+            except queue.Empty:
+                if stopping and not batch:
+                    return
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or stopping):
+                # 밀려 있는 기사가 있으면 배치 크기까지 채워서 처리 (대기 시간 초과로 1개씩 처리되지 않도록)
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+    def _schedule_loop(self):
+        last_runs = load_json(self.schedule_path, {})
+        while not self.stop_event.is_set():
+            now = datetime.now(timezone.utc)
+            for job in self.jobs:
+                if self.stop_event.is_set() or not job.is_due(now, last_runs.get(job.name)):
+                    continue
+                _log(f"예약 작업 시작: {job.name}")
+                try:
+                    job.func()
+                except Exception as e:
+                    self._count("errors")
+                    _log(f"✗ 예약 작업 실패: {job.name} - {e}")
+                # 실패해도 같은 날 반복 실행하지 않음 (다음 예약 시각에 다시 시도)
+                last_runs[job.name] = now.date().isoformat()
+                save_json(self.schedule_path, last_runs)
+            self.stop_event.wait(30)
+
+    def stop(self, *_):
+        if not self.stop_event.is_set():
+            _log("종료 요청을 받았습니다. 큐에 남은 기사를 처리한 뒤 종료합니다... (한 번 더 누르면 강제 종료)")
+            self.stop_event.set()
+            # 두 번째 신호는 기본 동작(즉시 종료)으로 처리
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    def run(self):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+        _log(f"상시 실행 모드 시작 (폴링 {self.poll_seconds:g}초, 배치 {self.batch_size}개 / 최대 대기 {self.max_wait_seconds:g}초, 큐 {self.queue.maxsize}개)")
+        threads = [
+            threading.Thread(target=self._poll_loop, name="stream-poll", daemon=True),
+            threading.Thread(target=self._consume_loop, name="stream-consume", daemon=True),
+            threading.Thread(target=self._schedule_loop, name="stream-schedule", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1.0)
+        _log(f"상시 실행 모드 종료: {self.stats}")
+        return self.stats
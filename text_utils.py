@@ -0,0 +1,59 @@
+import re
+import html
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 기사 식별과 무관한 추적용 쿼리 파라미터
+TRACKING_PARAMS = {
+    "guccounter", "guce_referrer", "guce_referrer_sig", "soc_src", "soc_trk",
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "cmpid", "ncid",
+    "siteid", "mod", "src", "yptr", "ref", "referrer", "source", "feed", "rss",
+    "tsrc", ".tsrc", "__source", "sr_share", "taid", "ito", "trk",
+}
+TRACKING_PREFIXES = ("utm_", "at_", "__twitter", "_hs")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TAG_RE = re.compile(r"<[^>]+>")
+_SCRIPT_RE = re.compile(r"<(script|style)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+
+
+def canonical_url(url):
+    """같은 기사를 가리키는 URL이 같은 문자열이 되도록 정규화한다."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = "https" if parts.scheme in ("http", "https") else parts.scheme.lower()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def normalize_text(text):
+    return _WHITESPACE_RE.sub(" ", text or "").strip().lower()
+
+
+def content_hash(article):
+    # 제목이나 요약이 바뀌면 다른 해시가 되어 재분석 대상이 됨
+    payload = f"{normalize_text(article.get('title'))}\n{normalize_text(article.get('summary'))}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def strip_html(text):
+    # RSS 요약에 섞인 태그/엔티티를 제거하고 공백을 정리
+    text = _SCRIPT_RE.sub(" ", text or "")
+    text = _TAG_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", html.unescape(text)).strip()
+
+
+def estimate_tokens(text):
+    # 영문은 약 4자당 1토큰, 한글 등 비ASCII 문자는 약 1.5자당 1토큰으로 근사
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return int((len(text) - non_ascii) / 4 + non_ascii / 1.5) + 1
@@ -0,0 +1,113 @@
+import os
+import re
+import csv
+from collections import deque
+
+from text_utils import strip_html
+
+# --- 로컬 종목 인식 (Aho-Corasick) ---
+TICKER_ALIASES_PATH = os.getenv("TICKER_ALIASES_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ticker_aliases.csv")
+
+# 대문자 단어로도 흔히 쓰여서 $AAPL / (NASDAQ: AAPL) 같은 문맥 없이는 종목으로 보지 않는 티커
+AMBIGUOUS_TICKERS = {"NOW", "LOW", "NET", "ARM", "CAT", "DASH", "SNOW", "HOOD", "COIN", "SHOP", "COST"}
+
+# 색인에 없는 종목이라도 명시적인 표기는 후보로 인정
+_CASHTAG_RE = re.compile(r"\$([A-Z]{1,5}(?:[.-][A-Z])?)\b")
+_EXCHANGE_RE = re.compile(r"\((?:NYSE|NASDAQ|Nasdaq|NYSEArca|AMEX|OTC)\s*:\s*([A-Z]{1,5}(?:[.-][A-Z])?)\)")
+# "AT&T", "Amazon.com", "Coca-Cola", "McDonald's" 같은 표기를 한 단어로 취급
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:[&'.\-][A-Za-z0-9]+)*|&")
+
+
+def tokenize(text):
+    # 원문 단어 목록 (소유격 's 제거)
+    words = _TOKEN_RE.findall((text or "").replace("\u2019", "'"))
+    return [w[:-2] if w.endswith(("'s", "'S")) else w for w in words]
+
+
+class AhoCorasick:
+    """여러 패턴을 입력 한 번 순회로 모두 찾는 Aho-Corasick 오토마톤.
+
+    패턴과 입력은 문자열이나 단어 튜플 등 임의의 시퀀스일 수 있다.
+    """
+
+    def __init__(self, patterns):
+        # patterns: {패턴 시퀀스: 값}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                if ch not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[node][ch] = len(self.goto) - 1
+                node = self.goto[node][ch]
+            self.output[node].append((len(pattern), value))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter_matches(self, sequence):
+        """(시작 위치, 끝 위치, 값)을 돌려준다."""
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for pos, ch in enumerate(sequence):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in output[node]:
+                yield pos - length + 1, pos + 1, value
+
+
+class TickerIndex:
+    """티커/회사명 별칭 색인. 기사 텍스트에서 후보 종목을 찾는다."""
+
+    def __init__(self, aliases):
+        # aliases: {티커: [회사명 별칭, ...]}
+        self.tickers = set(aliases)
+        # 소문자 단어 튜플 → [(티커, 요구되는 원문 표기)]
+        # 회사명은 대소문자 무관(None), 티커는 대문자로 쓰인 원문만 인정
+        # 단어 단위로 매칭하므로 "Intel"이 "Intelligence"에 걸리지 않음
+        patterns = {}
+        for ticker, names in aliases.items():
+            for name in names:
+                words = tuple(w.lower() for w in tokenize(name))
+                if words:
+                    patterns.setdefault(words, []).append((ticker, None))
+            if len(ticker) >= 3 and ticker not in AMBIGUOUS_TICKERS:
+                patterns.setdefault((ticker.lower(),), []).append((ticker, ticker))
+        self.automaton = AhoCorasick(patterns)
+
+    @classmethod
+    def load(cls, path=TICKER_ALIASES_PATH):
+        aliases = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                ticker = row["ticker"].strip().upper()
+                aliases[ticker] = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+        return cls(aliases)
+
+    def find_tickers(self, text):
+        text = text or ""
+        words = tokenize(text)
+        found = set()
+        for start, end, entries in self.automaton.iter_matches([w.lower() for w in words]):
+            for ticker, required_form in entries:
+                if required_form is None or words[start] == required_form:
+                    found.add(ticker)
+        found.update(_CASHTAG_RE.findall(text))
+        found.update(_EXCHANGE_RE.findall(text))
+        return sorted(found)
+
+    def find_in_article(self, article):
+        return self.find_tickers(f"{strip_html(article.get('title'))}\n{strip_html(article.get('summary'))}")
@@ -0,0 +1,147 @@
+import os
+import re
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+# --- 주간 보고서용 로컬 집계 설정 ---
+WEEKLY_REPORT_HORIZON = int(os.getenv("WEEKLY_REPORT_HORIZON", "1"))
+WEEKLY_REPORT_MAX_TICKERS = int(os.getenv("WEEKLY_REPORT_MAX_TICKERS", "15"))
+WEEKLY_REPORT_FAILURE_SAMPLES = int(os.getenv("WEEKLY_REPORT_FAILURE_SAMPLES", "8"))
+WEEKLY_REPORT_PRE_MORTEM_CHARS = int(os.getenv("WEEKLY_REPORT_PRE_MORTEM_CHARS", "300"))
+
+# 확신 점수 보정 구간 (하한, 상한, 이름)
+CONVICTION_BUCKETS = [(1, 5, "1-5"), (6, 7, "6-7"), (8, 8, "8"), (9, 10, "9-10")]
+# 이 점수 이상이면서 틀린 예측은, Pre-mortem에 위험을 적어두고도 확신을 낮추지 않은 것으로 본다
+IGNORED_RISK_MIN_CONVICTION = 8
+# 종목/사건과 무관하게 어디에나 붙는 위험 문구. 이런 위험만 적은 경우 구체적 위험을 놓친 것으로 본다
+_GENERIC_RISK_RE = re.compile(
+    r"거시|시장 전반|전반적인 시장|선반영|변동성|금리|경기|투자 심리|불확실성|"
+    r"macro|priced in|volatility|interest rate|sentiment|uncertaint",
+    re.IGNORECASE,
+)
+_RISK_ITEM_RE = re.compile(r"(?:^|\n)\s*\d+[).]\s*")
+
+
+def source_of(url):
+    # 기사 URL의 도메인을 출처로 사용 (www. 제거)
+    host = urlsplit(url or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else (host or "unknown")
+
+
+def classify_failure(conviction, pre_mortem):
+    """틀린 예측 하나를 'ignored'(위험을 알고도 무시), 'missed'(구체적 위험을 놓침), 'unclear'로 분류하는 휴리스틱."""
+    items = [item.strip() for item in _RISK_ITEM_RE.split(pre_mortem or "") if item.strip()]
+    if not items or all(_GENERIC_RISK_RE.search(item) for item in items):
+        return "missed"
+    if conviction is not None and not pd.isna(conviction) and conviction >= IGNORED_RISK_MIN_CONVICTION:
+        return "ignored"
+    return "unclear"
+
+
+def _accuracy_table(frame, column, correct_column, limit=None):
+    grouped = frame.groupby(column)[correct_column].agg(["count", "sum"])
+    grouped = grouped.sort_values("count", ascending=False)
+    if limit:
+        grouped = grouped.head(limit)
+    return [
+        {column: str(key), "n": int(row["count"]), "accuracy": round(float(row["sum"] / row["count"] * 100), 1)}
+        for key, row in grouped.iterrows()
+    ]
+
+
+def _sample_failures(failures, max_samples, pre_mortem_chars, correct_horizon):
+    """실패 유형 x 예측 방향 그룹을 번갈아 돌며, 그룹 안에서는 확신 점수가 높은 순으로 고른다."""
+    if failures.empty or max_samples <= 0:
+        return []
+    ordered = failures.sort_values(["conviction", f"return_{correct_horizon}d"], ascending=[False, True], na_position="last")
+    groups = [group for _, group in ordered.groupby(["risk_type", "sentiment"], sort=True)]
+    picked = []
+    depth = 0
+    while len(picked) < max_samples and any(depth < len(group) for group in groups):
+        for group in groups:
+            if depth < len(group) and len(picked) < max_samples:
+                picked.append(group.iloc[depth])
+        depth += 1
+    return [
+        {
+            "ticker": row["ticker"],
+            "prediction": row["sentiment"],
+            "conviction": None if pd.isna(row["conviction"]) else int(row["conviction"]),
+            "actual_change": round(float(row[f"return_{correct_horizon}d"]), 2),
+            "risk_type": row["risk_type"],
+            "source": row["source"],
+            "pre_mortem": (row["pre_mortem"] or "")[:pre_mortem_chars],
+        }
+        for row in picked
+    ]
+
+
+def build_weekly_aggregates(evaluated, horizons, horizon=WEEKLY_REPORT_HORIZON,
+                            max_tickers=WEEKLY_REPORT_MAX_TICKERS,
+                            max_failure_samples=WEEKLY_REPORT_FAILURE_SAMPLES,
+                            pre_mortem_chars=WEEKLY_REPORT_PRE_MORTEM_CHARS):
+    """평가 엔진 결과(evaluate_predictions)를 주간 보고서 프롬프트에 넣을 고정 크기 집계로 요약한다.
+
+    예측 건수와 무관하게 표의 행 수와 실패 표본 수가 상한으로 묶이므로 프롬프트 크기가 일정하다.
+    채점할 행이 없으면 None을 반환한다.
+    """
+    correct_column = f"correct_{horizon}d"
+    if evaluated.empty or correct_column not in evaluated:
+        return None
+    scored = evaluated[evaluated[correct_column].notna()].copy()
+    if scored.empty:
+        return None
+
+    scored["source"] = scored["url"].map(source_of) if "url" in scored else "unknown"
+    scored["conviction"] = pd.to_numeric(scored.get("conviction"), errors="coerce")
+    scored["pre_mortem"] = scored["pre_mortem"].fillna("") if "pre_mortem" in scored else ""
+
+    bucket_labels = np.full(len(scored), "unknown", dtype=object)
+    for low, high, name in CONVICTION_BUCKETS:
+        bucket_labels[((scored["conviction"] >= low) & (scored["conviction"] <= high)).to_numpy()] = name
+    scored["conviction_bucket"] = bucket_labels
+
+    failures = scored[scored[correct_column] == 0].copy()
+    failures["risk_type"] = [
+        classify_failure(conviction, pre_mortem)
+        for conviction, pre_mortem in zip(failures["conviction"], failures["pre_mortem"])
+    ]
+
+    total = int(len(scored))
+    correct = int(scored[correct_column].sum())
+    calibration = []
+    for _, _, name in CONVICTION_BUCKETS:
+        bucket = scored[scored["conviction_bucket"] == name]
+        if len(bucket):
+            calibration.append({
+                "bucket": name,
+                "n": int(len(bucket)),
+                "accuracy": round(float(bucket[correct_column].mean() * 100), 1),
+                "avg_abs_change": round(float(bucket[f"return_{horizon}d"].abs().mean()), 2),
+            })
+
+    horizon_accuracy = {}
+    for h in horizons:
+        column = evaluated.get(f"correct_{h}d")
+        if column is not None and column.notna().any():
+            horizon_accuracy[f"{h}d"] = round(float(column.dropna().mean() * 100), 1)
+    beat_column = evaluated.get(f"beat_benchmark_{horizon}d")
+    beat_rate = round(float(beat_column.dropna().mean() * 100), 1) if beat_column is not None and beat_column.notna().any() else None
+
+    return {
+        "horizon_days": horizon,
+        "total": total,
+        "correct": correct,
+        "accuracy": round(correct / total * 100, 1),
+        "accuracy_by_horizon": horizon_accuracy,
+        "benchmark_beat_rate": beat_rate,
+        "by_sentiment": _accuracy_table(scored, "sentiment", correct_column),
+        "by_ticker": _accuracy_table(scored, "ticker", correct_column, limit=max_tickers),
+        "ticker_count": int(scored["ticker"].nunique()),
+        "by_source": _accuracy_table(scored, "source", correct_column, limit=max_tickers),
+        "conviction_calibration": calibration,
+        "failure_risk_types": {k: int(v) for k, v in failures["risk_type"].value_counts().items()},
+        "failure_samples": _sample_failures(failures, max_failure_samples, pre_mortem_chars, horizon),
+    }